@@ -10,6 +10,13 @@ Sistema SIMPLIFICADO do Bazar Ecológico
 """
 
 from datetime import datetime
+import secrets
+import threading
+import time
+
+from firebase_admin import firestore
+
+from config_servico import obter_servico_config
 
 # Configuração do cupom
 CUSTO_CUPOM_BAZAR = 50
@@ -17,23 +24,23 @@ CUSTO_CUPOM_BAZAR = 50
 def verificar_cupom_liberado(db):
     """
     Verifica se o cupom de bazar está liberado para compra
+    (lido da configuração em memória, sem ir ao Firestore)
     
     Returns:
         (liberado, trimestre_atual, mensagem)
     """
-    config_ref = db.collection('config').document('cupom_bazar')
-    config_doc = config_ref.get()
+    config_servico = obter_servico_config(db)
+    config = config_servico.obter('cupom_bazar')
     
-    if not config_doc.exists:
+    if config is None:
         # Criar configuração inicial
-        config_ref.set({
+        config_servico.definir('cupom_bazar', {
             'liberado': False,
             'trimestre': 1,
             'dataLiberacao': None
         })
         return False, 1, "Cupom de Bazar ainda não foi liberado pelo administrador"
     
-    config = config_doc.to_dict()
     liberado = config.get('liberado', False)
     trimestre = config.get('trimestre', 1)
     
@@ -42,22 +49,34 @@ def verificar_cupom_liberado(db):
     
     return True, trimestre, "Cupom de Bazar disponível!"
 
-def liberar_cupom_bazar(db, trimestre):
+def liberar_cupom_bazar(db, trimestre, limite=None):
     """
     Admin libera o cupom de bazar para compra
     
     Args:
         db: Firestore client
         trimestre: Trimestre atual (1, 2 ou 3)
+        limite: Máximo de cupons vendidos no trimestre (None = sem limite)
+    
+    Com limite, o contador bazar_vendas/trimestre_N parte da contagem real
+    de cupons do trimestre (as vendas sem limite não incrementam o contador)
     
     Returns:
         (sucesso, mensagem)
     """
-    config_ref = db.collection('config').document('cupom_bazar')
+    if limite is not None:
+        vendidos = _agregar(
+            db.collection('cupons_bazar').where('trimestre', '==', trimestre).count(alias='vendidos')
+        ).get('vendidos', 0)
+        db.collection('bazar_vendas').document(f'trimestre_{trimestre}').set({
+            'trimestre': trimestre,
+            'vendidos': vendidos
+        })
     
-    config_ref.set({
+    obter_servico_config(db).definir('cupom_bazar', {
         'liberado': True,
         'trimestre': trimestre,
+        'limite': limite,
         'dataLiberacao': datetime.now()
     })
     
@@ -70,16 +89,10 @@ def fechar_cupom_bazar(db):
     Returns:
         (sucesso, mensagem)
     """
-    config_ref = db.collection('config').document('cupom_bazar')
-    config_doc = config_ref.get()
-    
-    if config_doc.exists:
-        config = config_doc.to_dict()
-        trimestre = config.get('trimestre', 1)
-    else:
-        trimestre = 1
+    config_servico = obter_servico_config(db)
+    trimestre = config_servico.valor('cupom_bazar', 'trimestre', 1)
     
-    config_ref.set({
+    config_servico.definir('cupom_bazar', {
         'liberado': False,
         'trimestre': trimestre,
         'dataFechamento': datetime.now()
@@ -87,61 +100,43 @@ def fechar_cupom_bazar(db):
     
     return True, "🔒 Cupom de Bazar FECHADO! Não pode mais ser comprado."
 
-def comprar_cupom_bazar(db, usuario_id):
+def comprar_cupom_bazar(db, usuario_id, fila=None):
     """
     Usuário compra Cupom de Bazar (50 pontos)
     
+    - Aberto/fechado vem da configuração em memória (sem ler config a cada compra)
+    - Passa pela fila de admissão (suaviza o pico quando a venda abre)
+    - Desconto dos pontos + criação do cupom numa única transação,
+      respeitando o limite de cupons do trimestre (se houver)
+    
     Returns:
         (sucesso, mensagem, cupom_codigo)
     """
-    # Verificar se cupom está liberado
-    liberado, trimestre, msg = verificar_cupom_liberado(db)
-    
-    if not liberado:
-        return False, msg, None
-    
-    # Buscar usuário
-    user_ref = db.collection('usuarios').document(str(usuario_id))
-    user_doc = user_ref.get()
-    
-    if not user_doc.exists:
-        return False, "Usuário não encontrado", None
-    
-    user_data = user_doc.to_dict()
-    
-    # Verificar pontos
-    if user_data.get('pontos', 0) < CUSTO_CUPOM_BAZAR:
-        return False, f"❌ Pontos insuficientes! Você tem {user_data.get('pontos', 0)}, precisa de {CUSTO_CUPOM_BAZAR}", None
-    
-    # Gerar código único do cupom
-    cupom_codigo = f"BAZAR-T{trimestre}-{int(datetime.now().timestamp() * 1000)}"
-    
-    # Deduzir pontos
-    novos_pontos = user_data['pontos'] - CUSTO_CUPOM_BAZAR
-    user_ref.update({'pontos': novos_pontos})
-    
-    # Registrar cupom no Firestore
-    cupom_data = {
-        'codigo': cupom_codigo,
-        'usuarioId': usuario_id,
-        'usuarioNome': user_data['nome'],
-        'usuarioTurma': user_data.get('turma', 'N/A'),
-        'trimestre': trimestre,
-        'pontosGastos': CUSTO_CUPOM_BAZAR,
-        'usado': False,
-        'dataCompra': datetime.now(),
-        'dataUso': None,
-        'observacoes': None
-    }
-    
-    db.collection('cupons_bazar').document(cupom_codigo).set(cupom_data)
-    
-    return True, f"✅ Cupom de Bazar comprado com sucesso!\n\nCódigo: {cupom_codigo}\n\n📍 Apresente este código no Bazar Físico para trocar por produtos!", cupom_codigo
+    config = obter_servico_config(db).obter('cupom_bazar') or {}
+    
+    if not config.get('liberado', False):
+        return False, "Cupom de Bazar não está disponível no momento", None
+    
+    fila = fila or _FILA_COMPRAS
+    if not fila.admitir():
+        return False, "⏳ Muitos pedidos agora! Tente de novo em alguns segundos.", None
+    
+    try:
+        return _comprar_em_transacao(
+            db.transaction(), db, usuario_id,
+            config.get('trimestre', 1), config.get('limite')
+        )
+    except ValueError:
+        # Tentativas da transação esgotadas (muita disputa pelo mesmo contador)
+        return False, "⏳ Muita gente comprando agora! Tente de novo em alguns segundos.", None
 
 def marcar_cupom_usado(db, cupom_codigo, observacoes=None):
     """
     Marca cupom como usado (admin faz isso no bazar físico)
     
+    Leitura e escrita na mesma transação: dois caixas não conseguem
+    usar o mesmo cupom
+    
     Args:
         db: Firestore client
         cupom_codigo: Código do cupom
@@ -150,28 +145,50 @@ def marcar_cupom_usado(db, cupom_codigo, observacoes=None):
     Returns:
         (sucesso, mensagem)
     """
-    cupom_ref = db.collection('cupons_bazar').document(cupom_codigo)
-    cupom_doc = cupom_ref.get()
-    
-    if not cupom_doc.exists:
-        return False, "❌ Cupom não encontrado!"
+    _, sucesso, mensagem = _usar_cupons_em_transacao(db.transaction(), db, [cupom_codigo], observacoes)[0]
+    return sucesso, mensagem
+
+@firestore.transactional
+def _usar_cupons_em_transacao(transaction, db, codigos, observacoes):
+    """
+    Returns:
+        list de (codigo, sucesso, mensagem), na ordem de codigos
+    """
+    refs = [db.collection('cupons_bazar').document(codigo) for codigo in codigos]
+    snapshots = {snap.id: snap for snap in db.get_all(refs, transaction=transaction)}
     
-    cupom_data = cupom_doc.to_dict()
+    resultados = []
+    vistos = set()
+    agora = datetime.now()
     
-    if cupom_data.get('usado', False):
-        data_uso = cupom_data.get('dataUso', 'N/A')
-        if hasattr(data_uso, 'strftime'):
-            data_uso = data_uso.strftime('%d/%m/%Y %H:%M')
-        return False, f"❌ Cupom já foi usado em {data_uso}"
-    
-    # Marcar como usado
-    cupom_ref.update({
-        'usado': True,
-        'dataUso': datetime.now(),
-        'observacoes': observacoes
-    })
+    for codigo, ref in zip(codigos, refs):
+        if codigo in vistos:
+            resultados.append((codigo, False, "❌ Código repetido no lote"))
+            continue
+        vistos.add(codigo)
+        
+        snap = snapshots.get(codigo)
+        if snap is None or not snap.exists:
+            resultados.append((codigo, False, "❌ Cupom não encontrado!"))
+            continue
+        
+        cupom_data = snap.to_dict()
+        
+        if cupom_data.get('usado', False):
+            data_uso = cupom_data.get('dataUso', 'N/A')
+            if hasattr(data_uso, 'strftime'):
+                data_uso = data_uso.strftime('%d/%m/%Y %H:%M')
+            resultados.append((codigo, False, f"❌ Cupom já foi usado em {data_uso}"))
+            continue
+        
+        transaction.update(ref, {
+            'usado': True,
+            'dataUso': agora,
+            'observacoes': observacoes
+        })
+        resultados.append((codigo, True, f"✅ Cupom {codigo} marcado como USADO!"))
     
-    return True, f"✅ Cupom {cupom_codigo} marcado como USADO!"
+    return resultados
 
 def verificar_cupom(db, cupom_codigo):
     """
@@ -201,30 +218,14 @@ def verificar_cupom(db, cupom_codigo):
 
 def get_meus_cupons(db, usuario_id):
     """
-    Busca todos os cupons de um usuário
+    Busca todos os cupons de um usuário, mais recentes primeiro
+    
+    Datas continuam como datetime; use formatar_data() na exibição
     
     Returns:
         Lista de cupons
     """
-    cupons_ref = db.collection('cupons_bazar')
-    query = cupons_ref.where('usuarioId', '==', usuario_id)
-    
-    cupons = []
-    for doc in query.stream():
-        data = doc.to_dict()
-        
-        # Converter timestamps
-        if 'dataCompra' in data and hasattr(data['dataCompra'], 'strftime'):
-            data['dataCompra'] = data['dataCompra'].strftime('%d/%m/%Y %H:%M')
-        if 'dataUso' in data and data['dataUso'] and hasattr(data['dataUso'], 'strftime'):
-            data['dataUso'] = data['dataUso'].strftime('%d/%m/%Y %H:%M')
-        
-        cupons.append(data)
-    
-    # Ordenar por data de compra (mais recente primeiro)
-    cupons = sorted(cupons, key=lambda x: x.get('dataCompra', ''), reverse=True)
-    
-    return cupons
+    return [doc.to_dict() for doc in _query_cupons(db, usuario_id=usuario_id).stream()]
 
 def get_estatisticas_cupons(db, trimestre=None):
     """
@@ -243,21 +244,14 @@ def get_estatisticas_cupons(db, trimestre=None):
     else:
         query = cupons_ref
     
-    cupons = list(query.stream())
+    # Agregações no servidor: 2 leituras, independente do nº de cupons
+    totais = _agregar(query.count(alias='total').sum('pontosGastos', alias='pontos'))
+    usados = _agregar(query.where('usado', '==', True).count(alias='total'))
     
-    total_cupons = len(cupons)
-    cupons_usados = 0
-    cupons_disponiveis = 0
-    pontos_arrecadados = 0
-    
-    for doc in cupons:
-        data = doc.to_dict()
-        pontos_arrecadados += data.get('pontosGastos', 0)
-        
-        if data.get('usado', False):
-            cupons_usados += 1
-        else:
-            cupons_disponiveis += 1
+    total_cupons = int(totais.get('total', 0))
+    cupons_usados = int(usados.get('total', 0))
+    cupons_disponiveis = total_cupons - cupons_usados
+    pontos_arrecadados = totais.get('pontos', 0) or 0
     
     stats = {
         'total_cupons': total_cupons,
@@ -270,9 +264,20 @@ def get_estatisticas_cupons(db, trimestre=None):
     
     return stats
 
+def _agregar(consulta):
+    """Executa uma AggregationQuery e devolve {alias: valor}"""
+    valores = {}
+    for resultado in consulta.get():
+        for agregacao in resultado:
+            valores[agregacao.alias] = agregacao.value
+    return valores
+
 def get_todos_cupons(db, filtro='todos'):
     """
-    Admin: Lista todos os cupons
+    Admin: Lista todos os cupons, mais recentes primeiro
+    
+    Filtro e ordenação rodam no Firestore; datas continuam como
+    datetime (use formatar_data() na exibição)
     
     Args:
         filtro: 'todos', 'usados', 'disponiveis'
@@ -280,27 +285,453 @@ def get_todos_cupons(db, filtro='todos'):
     Returns:
         Lista de cupons
     """
-    cupons_ref = db.collection('cupons_bazar')
+    return [doc.to_dict() for doc in _query_cupons(db, filtro).stream()]
+
+# ========================================
+# LISTAGEM PAGINADA
+# ========================================
+
+TAMANHO_PAGINA = 50
+
+def formatar_data(valor, padrao='N/A'):
+    """datetime -> 'dd/mm/YYYY HH:MM' (só na hora de exibir)"""
+    if hasattr(valor, 'strftime'):
+        return valor.strftime('%d/%m/%Y %H:%M')
+    return valor if valor else padrao
+
+def _query_cupons(db, filtro='todos', usuario_id=None):
+    """
+    Query de cupons_bazar ordenada por dataCompra (desc)
+    
+    Índices compostos em firestore.indexes.json:
+    (usado, dataCompra desc) e (usuarioId, dataCompra desc)
+    """
+    query = db.collection('cupons_bazar')
+    
+    if usuario_id is not None:
+        query = query.where('usuarioId', '==', usuario_id)
+    
+    if filtro == 'usados':
+        query = query.where('usado', '==', True)
+    elif filtro == 'disponiveis':
+        query = query.where('usado', '==', False)
+    
+    return query.order_by('dataCompra', direction=firestore.Query.DESCENDING)
+
+def _pagina(query, tamanho, cursor):
+    if cursor is not None:
+        query = query.start_after(cursor)
     
-    cupons = []
-    for doc in cupons_ref.stream():
-        data = doc.to_dict()
+    # Um a mais para saber se existe próxima página
+    docs = list(query.limit(tamanho + 1).stream())
+    proximo = docs[tamanho - 1] if len(docs) > tamanho else None
+    
+    return [doc.to_dict() for doc in docs[:tamanho]], proximo
+
+def paginar_todos_cupons(db, filtro='todos', tamanho=TAMANHO_PAGINA, cursor=None):
+    """
+    Admin: uma página de cupons
+    
+    Args:
+        filtro: 'todos', 'usados', 'disponiveis'
+        cursor: None para a primeira página, ou o cursor retornado
+            pela chamada anterior
+    
+    Returns:
+        (cupons, proximo_cursor) - proximo_cursor é None na última página
+    """
+    return _pagina(_query_cupons(db, filtro), tamanho, cursor)
+
+def paginar_meus_cupons(db, usuario_id, tamanho=TAMANHO_PAGINA, cursor=None):
+    """
+    Uma página dos cupons do usuário
+    
+    Returns:
+        (cupons, proximo_cursor) - proximo_cursor é None na última página
+    """
+    return _pagina(_query_cupons(db, usuario_id=usuario_id), tamanho, cursor)
+
+# ========================================
+# MODO CAIXA (BAZAR FÍSICO)
+# ========================================
+
+# Máximo de documentos por transação do Firestore
+LIMITE_TRANSACAO = 500
+
+def _formatar_cupom(cupom_data):
+    """Cópia do cupom com datas em dd/mm/YYYY HH:MM (para exibição)"""
+    cupom_data = dict(cupom_data)
+    if 'dataCompra' in cupom_data and hasattr(cupom_data['dataCompra'], 'strftime'):
+        cupom_data['dataCompra'] = cupom_data['dataCompra'].strftime('%d/%m/%Y %H:%M')
+    if 'dataUso' in cupom_data and cupom_data['dataUso'] and hasattr(cupom_data['dataUso'], 'strftime'):
+        cupom_data['dataUso'] = cupom_data['dataUso'].strftime('%d/%m/%Y %H:%M')
+    return cupom_data
+
+class CaixaBazar:
+    """
+    Caixa do bazar físico com os cupons não usados do trimestre em memória
+    
+    - Carrega os cupons com um listener (on_snapshot), que mantém o
+      índice atualizado quando alguém compra ou outro caixa usa um cupom
+    - validar(): consulta O(1) no índice, sem ler o Firestore
+    - resgatar() / resgatar_lote(): transação, evita uso duplo entre caixas
+    
+    Uso:
+        caixa = CaixaBazar(db).iniciar()
+        valido, cupom, msg = caixa.validar(codigo)
+        resultados = caixa.resgatar_lote(codigos_escaneados)
+        caixa.parar()
+    """
+    
+    def __init__(self, db, trimestre=None):
+        self.db = db
+        self.trimestre = trimestre
+        self._indice = {}
+        self._lock = threading.Lock()
+        self._watch = None
+    
+    def iniciar(self):
+        if self.trimestre is None:
+            self.trimestre = obter_servico_config(self.db).valor('cupom_bazar', 'trimestre', 1)
         
-        # Converter timestamps
-        if 'dataCompra' in data and hasattr(data['dataCompra'], 'strftime'):
-            data['dataCompra'] = data['dataCompra'].strftime('%d/%m/%Y %H:%M')
-        if 'dataUso' in data and data['dataUso'] and hasattr(data['dataUso'], 'strftime'):
-            data['dataUso'] = data['dataUso'].strftime('%d/%m/%Y %H:%M')
+        query = (self.db.collection('cupons_bazar')
+                 .where('usado', '==', False)
+                 .where('trimestre', '==', self.trimestre))
+        self._watch = query.on_snapshot(self._ao_mudar)
+        return self
+    
+    def parar(self):
+        if self._watch:
+            self._watch.unsubscribe()
+            self._watch = None
+    
+    def _ao_mudar(self, docs, changes, read_time):
+        # O snapshot traz o resultado completo da query a cada mudança
+        indice = {doc.id: doc.to_dict() for doc in docs}
+        with self._lock:
+            self._indice = indice
+    
+    def __len__(self):
+        return len(self._indice)
+    
+    def validar(self, cupom_codigo):
+        """
+        Mesmo retorno de verificar_cupom(); só lê o Firestore se o código
+        não está no índice (usado, de outro trimestre ou inexistente)
         
-        # Aplicar filtro
-        if filtro == 'usados' and not data.get('usado', False):
-            continue
-        if filtro == 'disponiveis' and data.get('usado', False):
-            continue
+        Returns:
+            (valido, cupom_data, mensagem)
+        """
+        cupom_codigo = cupom_codigo.strip()
+        cupom_data = self._indice.get(cupom_codigo)
+        
+        if cupom_data is None:
+            return verificar_cupom(self.db, cupom_codigo)
+        
+        cupom_data = _formatar_cupom(cupom_data)
+        return True, cupom_data, f"✅ Cupom VÁLIDO!\n\nAluno: {cupom_data['usuarioNome']} ({cupom_data['usuarioTurma']})\nTrimestre: {cupom_data['trimestre']}º"
+    
+    def resgatar(self, cupom_codigo, observacoes=None):
+        """
+        Returns:
+            (sucesso, mensagem)
+        """
+        _, sucesso, mensagem = self.resgatar_lote([cupom_codigo], observacoes)[0]
+        return sucesso, mensagem
+    
+    def resgatar_lote(self, codigos, observacoes=None):
+        """
+        Usa vários cupons escaneados de uma vez (uma transação a cada 500)
+        
+        Returns:
+            list de (codigo, sucesso, mensagem), na ordem recebida
+        """
+        codigos = [codigo.strip() for codigo in codigos]
+        resultados = []
+        
+        for i in range(0, len(codigos), LIMITE_TRANSACAO):
+            bloco = codigos[i:i + LIMITE_TRANSACAO]
+            resultados += _usar_cupons_em_transacao(self.db.transaction(), self.db, bloco, observacoes)
         
-        cupons.append(data)
+        # Tira do índice na hora, sem esperar o listener
+        with self._lock:
+            for codigo, sucesso, _ in resultados:
+                if sucesso:
+                    self._indice.pop(codigo, None)
+        
+        return resultados
+
+# ========================================
+# COMPRA EM ALTA CONCORRÊNCIA
+# ========================================
+
+class FilaAdmissao:
+    """
+    Token bucket com espera limitada
+    
+    - taxa: compras liberadas por segundo (reposição de fichas)
+    - rajada: fichas acumuladas no máximo (absorve picos curtos)
+    - max_espera: pedidos aguardando ao mesmo tempo; acima disso
+      recusa na hora em vez de empilhar threads
+    """
+    
+    def __init__(self, taxa=20.0, rajada=40, max_espera=500, timeout=10.0):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.max_espera = max_espera
+        self.timeout = timeout
+        self._fichas = float(rajada)
+        self._ultima = time.monotonic()
+        self._esperando = 0
+        self._cond = threading.Condition()
+    
+    def _repor(self):
+        agora = time.monotonic()
+        self._fichas = min(self.rajada, self._fichas + (agora - self._ultima) * self.taxa)
+        self._ultima = agora
+    
+    def admitir(self, timeout=None):
+        """
+        Returns:
+            True quando ganhou uma ficha, False se a fila está cheia
+            ou o tempo de espera acabou
+        """
+        prazo = time.monotonic() + (self.timeout if timeout is None else timeout)
+        
+        with self._cond:
+            if self._esperando >= self.max_espera:
+                return False
+            self._esperando += 1
+            
+            try:
+                while True:
+                    self._repor()
+                    if self._fichas >= 1:
+                        self._fichas -= 1
+                        return True
+                    
+                    restante = prazo - time.monotonic()
+                    if restante <= 0:
+                        return False
+                    self._cond.wait(min((1 - self._fichas) / self.taxa, restante))
+            finally:
+                self._esperando -= 1
+
+_FILA_COMPRAS = FilaAdmissao()
+
+def _gerar_codigo_cupom(trimestre):
+    # Sufixo aleatório: duas compras no mesmo milissegundo não colidem
+    return f"BAZAR-T{trimestre}-{int(datetime.now().timestamp() * 1000)}-{secrets.token_hex(2).upper()}"
+
+@firestore.transactional
+def _comprar_em_transacao(transaction, db, usuario_id, trimestre, limite):
+    user_ref = db.collection('usuarios').document(str(usuario_id))
+    vendas_ref = db.collection('bazar_vendas').document(f'trimestre_{trimestre}')
+    
+    user_doc = user_ref.get(transaction=transaction)
+    # Só lê/escreve o contador quando há limite (evita um documento quente);
+    # liberar_cupom_bazar() acerta o contador ao ligar o limite
+    vendas_doc = vendas_ref.get(transaction=transaction) if limite is not None else None
+    
+    if not user_doc.exists:
+        return False, "Usuário não encontrado", None
+    
+    user_data = user_doc.to_dict()
+    pontos = user_data.get('pontos', 0)
+    
+    if pontos < CUSTO_CUPOM_BAZAR:
+        return False, f"❌ Pontos insuficientes! Você tem {pontos}, precisa de {CUSTO_CUPOM_BAZAR}", None
+    
+    if limite is not None:
+        vendidos = vendas_doc.to_dict().get('vendidos', 0) if vendas_doc.exists else 0
+        if vendidos >= limite:
+            return False, "❌ Cupons de Bazar esgotados neste trimestre!", None
+    
+    cupom_codigo = _gerar_codigo_cupom(trimestre)
     
-    # Ordenar por data de compra (mais recente primeiro)
-    cupons = sorted(cupons, key=lambda x: x.get('dataCompra', ''), reverse=True)
+    transaction.update(user_ref, {'pontos': pontos - CUSTO_CUPOM_BAZAR})
+    transaction.create(db.collection('cupons_bazar').document(cupom_codigo), {
+        'codigo': cupom_codigo,
+        'usuarioId': usuario_id,
+        'usuarioNome': user_data['nome'],
+        'usuarioTurma': user_data.get('turma', 'N/A'),
+        'trimestre': trimestre,
+        'pontosGastos': CUSTO_CUPOM_BAZAR,
+        'usado': False,
+        'dataCompra': datetime.now(),
+        'dataUso': None,
+        'observacoes': None
+    })
     
-    return cupons
+    if limite is not None:
+        transaction.set(vendas_ref, {
+            'trimestre': trimestre,
+            'vendidos': firestore.Increment(1)
+        }, merge=True)
+    
+    return True, f"✅ Cupom de Bazar comprado com sucesso!\n\nCódigo: {cupom_codigo}\n\n📍 Apresente este código no Bazar Físico para trocar por produtos!", cupom_codigo
+
+# ========================================
+# TESTE DE CARGA
+# ========================================
+
+TRIMESTRE_CARGA = 9
+PREFIXO_CARGA = 'carga_bazar_'
+
+def _apagar_em_lotes(db, refs):
+    refs = list(refs)
+    for i in range(0, len(refs), 500):
+        batch = db.batch()
+        for ref in refs[i:i + 500]:
+            batch.delete(ref)
+        batch.commit()
+
+def _limpar_teste_carga(db, ids):
+    """Apaga usuários, cupons e contador do trimestre de carga"""
+    cupons = db.collection('cupons_bazar').where('trimestre', '==', TRIMESTRE_CARGA).select(['__name__'])
+    _apagar_em_lotes(db, [doc.reference for doc in cupons.stream()])
+    _apagar_em_lotes(db, [db.collection('usuarios').document(user_id) for user_id in ids])
+    db.collection('bazar_vendas').document(f'trimestre_{TRIMESTRE_CARGA}').delete()
+
+def teste_carga_compras(db, compradores=1000, limite=300, fila=None):
+    """
+    Simula a abertura da venda: `compradores` alunos clicam ao mesmo tempo
+    
+    Rodar só contra um banco local (emulador do Firestore ou
+    firestore_memoria, ver testar_carga_em_memoria): cria usuários
+    carga_bazar_*, libera a venda no trimestre TRIMESTRE_CARGA e confere os
+    invariantes. No fim apaga usuários, cupons e contador do teste e volta
+    config/cupom_bazar ao que era (pode rodar de novo no mesmo banco)
+    
+    Returns:
+        dict com vendidos, recusas por motivo, tempos e invariantes
+    """
+    trimestre = TRIMESTRE_CARGA
+    fila = fila or FilaAdmissao(taxa=500, rajada=100, max_espera=compradores, timeout=30)
+    
+    # 1 em cada 5 alunos não tem pontos suficientes
+    pontos_iniciais = {
+        f'{PREFIXO_CARGA}{i}': (CUSTO_CUPOM_BAZAR + 10) if i % 5 else (CUSTO_CUPOM_BAZAR - 10)
+        for i in range(compradores)
+    }
+    ids = list(pontos_iniciais)
+    
+    config_servico = obter_servico_config(db)
+    config_anterior = config_servico.obter('cupom_bazar')
+    # Sobras de uma execução interrompida
+    _limpar_teste_carga(db, ids)
+    try:
+        return _executar_teste_carga(db, trimestre, limite, fila, pontos_iniciais)
+    finally:
+        _limpar_teste_carga(db, ids)
+        config_servico.definir('cupom_bazar', config_anterior or {
+            'liberado': False,
+            'trimestre': 1,
+            'dataLiberacao': None
+        })
+
+def _executar_teste_carga(db, trimestre, limite, fila, pontos_iniciais):
+    ids = list(pontos_iniciais)
+    compradores = len(ids)
+    for i in range(0, len(ids), 500):
+        batch = db.batch()
+        for user_id in ids[i:i + 500]:
+            batch.set(db.collection('usuarios').document(user_id), {
+                'id': user_id, 'nome': user_id, 'turma': '901', 'pontos': pontos_iniciais[user_id]
+            })
+        batch.commit()
+    
+    liberar_cupom_bazar(db, trimestre, limite=limite)
+    
+    largada = threading.Barrier(compradores)
+    resultados = [None] * compradores
+    
+    def comprar(i):
+        largada.wait()
+        inicio = time.perf_counter()
+        sucesso, mensagem, codigo = comprar_cupom_bazar(db, ids[i], fila=fila)
+        resultados[i] = (sucesso, mensagem, codigo, time.perf_counter() - inicio)
+    
+    threads = [threading.Thread(target=comprar, args=(i,)) for i in range(compradores)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+    
+    fechar_cupom_bazar(db)
+    
+    vendidos = [r for r in resultados if r[0]]
+    recusas = {}
+    for sucesso, mensagem, _, _ in resultados:
+        if not sucesso:
+            motivo = mensagem.split('!')[0]
+            recusas[motivo] = recusas.get(motivo, 0) + 1
+    
+    cupons = {
+        doc.id: doc.to_dict()
+        for doc in db.collection('cupons_bazar').where('trimestre', '==', trimestre).stream()
+    }
+    pontos_finais = {
+        user_id: db.collection('usuarios').document(user_id).get().to_dict()['pontos']
+        for user_id in ids
+    }
+    gastos = {}
+    for cupom in cupons.values():
+        gastos[cupom['usuarioId']] = gastos.get(cupom['usuarioId'], 0) + cupom['pontosGastos']
+    
+    latencias = sorted(r[3] for r in resultados)
+    
+    return {
+        'compradores': compradores,
+        'vendidos': len(vendidos),
+        'recusas': recusas,
+        'duracao_s': duracao,
+        'latencia_p50_ms': latencias[len(latencias) // 2] * 1000,
+        'latencia_p95_ms': latencias[int(len(latencias) * 0.95)] * 1000,
+        'respeitou_limite': limite is None or len(cupons) <= limite,
+        'cupons_gravados_iguais_vendidos': len(cupons) == len(vendidos),
+        'pontos_conferem': all(
+            pontos_finais[u] == pontos_iniciais[u] - gastos.get(u, 0) and pontos_finais[u] >= 0
+            for u in ids
+        )
+    }
+
+def testar_carga_em_memoria(compradores=1000):
+    """
+    Teste de carga sem infraestrutura: firestore_memoria.ClienteMemoria,
+    com e sem limite de cupons
+    
+    Returns:
+        True se todos os invariantes valeram nas duas rodadas
+    """
+    from firestore_memoria import ClienteMemoria
+    
+    db = ClienteMemoria()
+    print("🧪 TESTE DE CARGA - ABERTURA DA VENDA DO CUPOM DE BAZAR (em memória)\n")
+    
+    ok = True
+    for limite in (300, None):
+        resultado = teste_carga_compras(db, compradores=compradores, limite=limite)
+        print(f"limite={limite}")
+        for chave, valor in resultado.items():
+            print(f"  {chave}: {valor}")
+        ok &= resultado['respeitou_limite'] and resultado['cupons_gravados_iguais_vendidos'] and resultado['pontos_conferem']
+    
+    print(f"\n{'✅' if ok else '❌'} Invariantes {'OK' if ok else 'FALHARAM'}")
+    return ok
+
+if __name__ == "__main__":
+    # Padrão: Firestore em memória (sem infraestrutura)
+    # Emulador: FIRESTORE_EMULATOR_HOST=localhost:8080 python bazar_ecologico.py
+    import os
+    if not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+        testar_carga_em_memoria()
+    else:
+        import firebase_admin
+        firebase_admin.initialize_app(options={'projectId': 'eco-eletronico-carga'})
+        resultado = teste_carga_compras(firestore.client())
+        print("🧪 TESTE DE CARGA - ABERTURA DA VENDA DO CUPOM DE BAZAR\n")
+        for chave, valor in resultado.items():
+            print(f"{chave}: {valor}")
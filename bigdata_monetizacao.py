@@ -9,14 +9,107 @@ Sistema de Big Data totalmente anônimo e ético para monetização
 - Transparência total com o usuário
 """
 
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import copy
+import hashlib
 import json
+import os
+import secrets
+import threading
+import time
+from firebase_admin import firestore
+from bigdata_analytics import NUMPY_DISPONIVEL, carregar_colunas, agregar_colunas
+from bigdata_sketches import obter_sketches
+
+# Coleções de agregados pré-calculados (rollups)
+COLECAO_ROLLUPS_HORA = 'bigdata_rollups_hora'
+COLECAO_ROLLUPS_DIA = 'bigdata_rollups_dia'
+
+# Documento que marca se os rollups cobrem todo o histórico de eventos
+COLECAO_ROLLUPS_META = 'bigdata_rollups_meta'
+DOC_COBERTURA = 'cobertura'
+
+# Sem a marca, a cobertura é lida de novo no máximo a cada N segundos
+INTERVALO_COBERTURA = 300
+
+# Limite de operações por WriteBatch do Firestore
+LIMITE_BATCH = 500
+
+# Tipos de evento aceitos na ingestão
+TIPOS_EVENTO = ('pesquisa', 'intencao_cupom')
+
+class CacheRelatorios:
+    """
+    Cache LRU com expiração para pacotes/contagens já calculados
+    
+    As chaves incluem a marca d'água dos dados (último evento gravado),
+    então um evento novo invalida naturalmente as entradas antigas.
+    Importações de eventos antigos não mudam a marca d'água, por isso
+    registrar_eventos_lote e reconstruir_rollups limpam o cache
+    """
+    
+    def __init__(self, max_itens=32, ttl_segundos=300):
+        self.max_itens = max_itens
+        self.ttl_segundos = ttl_segundos
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            
+            criado_em, valor = item
+            if time.monotonic() - criado_em > self.ttl_segundos:
+                del self._itens[chave]
+                return None
+            
+            self._itens.move_to_end(chave)
+            return valor
+    
+    def set(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = (time.monotonic(), valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+    
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+# Cache compartilhado por todas as instâncias (pacote, exportação, projeções)
+_CACHE_RELATORIOS = CacheRelatorios()
+
+# Cobertura dos rollups por client (id(db)): (completo, monotonic da leitura)
+_COBERTURA_POR_DB = {}
+# Clients cuja primeira gravação já conferiu se o banco era novo
+_BANCOS_CONFERIDOS = set()
 
 class BigDataEcoEletronico:
     """Gerenciador de Big Data Ético"""
     
-    def __init__(self, db):
+    def __init__(self, db, usar_rollups=True, motor_vetorizado=True):
+        """
+        Args:
+            db: Firestore client
+            usar_rollups: Se True, relatórios leem os buckets agregados
+                          (hora/dia) em vez dos eventos brutos, desde que
+                          os rollups cubram todo o histórico (senão os
+                          relatórios leem os eventos brutos). False força
+                          a leitura dos eventos brutos (auditoria, ou para
+                          conferir os rollups)
+            motor_vetorizado: Se True e o NumPy estiver instalado, agrega
+                              com bigdata_analytics todo evento bruto lido
+                              (modo sem rollups, histórico ainda não
+                              coberto e horas incompletas nas pontas)
+        """
         self.db = db
+        self.usar_rollups = usar_rollups
+        self.motor_vetorizado = motor_vetorizado and NUMPY_DISPONIVEL
+        self.sketches = obter_sketches(db)
     
     def registrar_evento_pesquisa(self, categoria, material, consentimento_usuario=True):
         """
@@ -31,21 +124,14 @@ class BigDataEcoEletronico:
         if not consentimento_usuario:
             return  # Não registra sem consentimento
         
-        evento_id = int(datetime.now().timestamp() * 1000)
-        
-        dados = {
-            'id': evento_id,
+        dados = _montar_evento({
             'tipo': 'pesquisa',
-            'timestamp': datetime.now(),
             'categoria': categoria,
-            'material': material,
-            'dia_semana': datetime.now().weekday(),  # 0-6
-            'hora': datetime.now().hour,
-            'mes': datetime.now().month,
-            # SEM DADOS PESSOAIS - APENAS AGREGADOS
-        }
+            'material': material
+        }, datetime.now())
         
-        self.db.collection('bigdata_eventos').document(str(evento_id)).set(dados)
+        self._gravar_evento(dados)
+        self.sketches.registrar(material)
     
     def registrar_intencao_compra_cupom(self, categoria_cupom, pontos_necessarios, pontos_usuario, consentimento=True):
         """
@@ -55,161 +141,463 @@ class BigDataEcoEletronico:
         if not consentimento:
             return
         
-        evento_id = int(datetime.now().timestamp() * 1000)
-        
-        dados = {
-            'id': evento_id,
+        dados = _montar_evento({
             'tipo': 'intencao_cupom',
-            'timestamp': datetime.now(),
             'categoria_cupom': categoria_cupom,
             'pontos_necessarios': pontos_necessarios,
-            'pontos_disponiveis': pontos_usuario,
-            'tem_pontos_suficientes': pontos_usuario >= pontos_necessarios,
-            'dia_semana': datetime.now().weekday(),
-            'hora': datetime.now().hour,
-            'mes': datetime.now().month
-        }
+            'pontos_disponiveis': pontos_usuario
+        }, datetime.now())
         
-        self.db.collection('bigdata_eventos').document(str(evento_id)).set(dados)
+        self._gravar_evento(dados)
     
-    def gerar_relatorio_tendencias(self, data_inicio, data_fim):
+    # ========================================
+    # INGESTÃO EM LOTE
+    # ========================================
+    
+    def registrar_eventos_lote(self, eventos, momento=None, tamanho_lote=LIMITE_BATCH, tentativas=5):
         """
-        Gera relatório de tendências para venda
-        100% AGREGADO E ANÔNIMO
+        Registra muitos eventos de uma vez (importação de histórico)
+        
+        Cada WriteBatch cria (create) até tamanho_lote documentos entre
+        eventos brutos e incrementos dos buckets desses eventos, então
+        evento e rollup entram juntos ou não entram. Os IDs são
+        determinísticos: reimportar o mesmo conteúdo (ex: spool após
+        falha no meio) pula os eventos já gravados em vez de contá-los
+        de novo.
+        
+        Identidade de cada evento: 'evento_id' quando vier; senão a
+        posição no iterável + o conteúdo recebido (com o 'timestamp' do
+        próprio evento, se houver, mas nunca o carimbo padrão de
+        'momento'). Por isso um lote novo com eventos idênticos, nas
+        mesmas posições, de um lote anterior precisa trazer 'evento_id'
+        ou 'timestamp' distintos para não ser tomado como reimportação. Em caso de erro o lote é conferido e refeito com backoff
+        exponencial, sem repetir incrementos já aplicados.
+        
+        Args:
+            eventos: iterável de dicts com 'tipo' ('pesquisa' ou 'intencao_cupom')
+                     e os campos do tipo (categoria/material ou categoria_cupom/
+                     pontos_necessarios/pontos_disponiveis). Pode trazer
+                     'timestamp' (datetime ou ISO), 'consentimento' e
+                     'evento_id' (identidade estável do evento)
+            momento: Carimbo de tempo dos eventos sem timestamp (padrão: agora)
+            tamanho_lote: Operações por WriteBatch (máx. 500)
+            tentativas: Tentativas por lote antes de desistir
         
         Returns:
-            dict com estatísticas agregadas
+            dict com quantidade de eventos gravados, duplicados (já
+            existiam) e ignorados
         """
-        # Buscar eventos no período
-        eventos_ref = self.db.collection('bigdata_eventos')
-        query = eventos_ref.where('timestamp', '>=', data_inicio).where('timestamp', '<=', data_fim)
+        momento = momento or datetime.now()
         
-        eventos = []
-        for doc in query.stream():
-            data = doc.to_dict()
-            if 'timestamp' in data and hasattr(data['timestamp'], 'strftime'):
-                data['timestamp'] = data['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
-            eventos.append(data)
-        
-        # Análises agregadas
-        relatorio = {
-            'periodo': {
-                'inicio': data_inicio.strftime('%d/%m/%Y'),
-                'fim': data_fim.strftime('%d/%m/%Y')
-            },
-            'total_eventos': len(eventos),
-            'eventos_por_tipo': {},
-            'materiais_mais_pesquisados': {},
-            'categorias_mais_buscadas': {},
-            'horarios_pico': {},
-            'dias_semana_ativos': {},
-            'intencoes_compra': {
-                'total': 0,
-                'com_pontos_suficientes': 0,
-                'sem_pontos_suficientes': 0,
-                'cupons_mais_desejados': {}
-            },
-            'insights': []
-        }
+        resultado = {'gravados': 0, 'duplicados': 0, 'ignorados': 0}
+        bloco = []
+        buckets_bloco = set()
         
-        # Processar eventos
-        for evento in eventos:
-            tipo = evento.get('tipo', 'desconhecido')
-            relatorio['eventos_por_tipo'][tipo] = relatorio['eventos_por_tipo'].get(tipo, 0) + 1
+        for posicao, evento in enumerate(eventos):
+            if evento.get('consentimento', True) is False or evento.get('tipo') not in TIPOS_EVENTO:
+                resultado['ignorados'] += 1
+                continue
             
-            # Materiais pesquisados
-            if tipo == 'pesquisa':
-                material = evento.get('material', 'N/A')
-                categoria = evento.get('categoria', 'N/A')
-                
-                relatorio['materiais_mais_pesquisados'][material] = \
-                    relatorio['materiais_mais_pesquisados'].get(material, 0) + 1
-                
-                relatorio['categorias_mais_buscadas'][categoria] = \
-                    relatorio['categorias_mais_buscadas'].get(categoria, 0) + 1
+            dados = _montar_evento(evento, momento)
+            chave = evento.get('evento_id')
+            if chave is None:
+                # Sem identidade explícita: posição + conteúdo como veio (o
+                # carimbo padrão de 'momento' fica de fora, senão mudaria
+                # a cada reimportação)
+                chave = f"{posicao}:{json.dumps(evento, sort_keys=True, default=str)}"
             
-            # Intenções de compra
-            if tipo == 'intencao_cupom':
-                relatorio['intencoes_compra']['total'] += 1
-                
-                if evento.get('tem_pontos_suficientes'):
-                    relatorio['intencoes_compra']['com_pontos_suficientes'] += 1
-                else:
-                    relatorio['intencoes_compra']['sem_pontos_suficientes'] += 1
+            bloco.append((_id_evento(dados, str(chave)), dados))
+            buckets_bloco.update(_buckets_do_momento(dados['timestamp']))
+            
+            # Cada evento soma até 3 operações (create + 2 buckets novos)
+            if len(bloco) + len(buckets_bloco) > tamanho_lote - 3:
+                self._gravar_bloco(bloco, tentativas, resultado)
+                bloco = []
+                buckets_bloco = set()
+        
+        if bloco:
+            self._gravar_bloco(bloco, tentativas, resultado)
+        
+        _CACHE_RELATORIOS.limpar()
+        
+        return resultado
+    
+    def reprocessar_spool(self, caminho, tamanho_lote=LIMITE_BATCH, tentativas=5):
+        """
+        Importa um arquivo NDJSON (um evento JSON por linha)
+        O arquivo é lido em streaming, sem carregar tudo na memória
+        
+        Linhas sem 'evento_id' são identificadas por arquivo + número da
+        linha + conteúdo, então reprocessar o mesmo spool é seguro
+        
+        Returns:
+            dict com quantidade de eventos gravados, duplicados e ignorados
+        """
+        nome = os.path.basename(caminho)
+        
+        def ler_linhas():
+            with open(caminho, encoding='utf-8') as arquivo:
+                for numero, linha in enumerate(arquivo, 1):
+                    if linha.strip():
+                        evento = json.loads(linha)
+                        evento.setdefault('evento_id', f"{nome}:{numero}:{linha.strip()}")
+                        yield evento
+        
+        return self.registrar_eventos_lote(ler_linhas(), tamanho_lote=tamanho_lote, tentativas=tentativas)
+    
+    def _gravar_bloco(self, bloco, tentativas, resultado):
+        """
+        Cria os eventos do bloco que ainda não existem e incrementa os
+        buckets só desses, num único WriteBatch
+        
+        A cada tentativa os IDs são conferidos de novo: se um commit
+        anterior foi aplicado apesar do erro, nada é somado duas vezes
+        """
+        eventos_ref = self.db.collection('bigdata_eventos')
+        refs = [eventos_ref.document(doc_id) for doc_id, _ in bloco]
+        
+        # IDs de um commit que deu erro (pode ter sido aplicado mesmo assim)
+        tentados = set()
+        
+        for tentativa in range(tentativas):
+            try:
+                existentes = {
+                    doc.id for doc in self.db.get_all(refs, field_paths=['tipo'])
+                    if doc.exists
+                }
+                novos = [(ref, dados) for ref, (doc_id, dados) in zip(refs, bloco) if doc_id not in existentes]
                 
-                cupom = evento.get('categoria_cupom', 'N/A')
-                relatorio['intencoes_compra']['cupons_mais_desejados'][cupom] = \
-                    relatorio['intencoes_compra']['cupons_mais_desejados'].get(cupom, 0) + 1
+                if novos:
+                    self._conferir_banco_novo()
+                    buckets = {}
+                    batch = self.db.batch()
+                    for ref, dados in novos:
+                        batch.create(ref, dados)
+                        for chave in _buckets_do_momento(dados['timestamp']):
+                            _somar_contadores(buckets.setdefault(chave, {}), _contadores_evento(dados, 1))
+                    
+                    for (colecao, inicio), contadores in buckets.items():
+                        bucket_ref = self.db.collection(colecao).document(_id_bucket(colecao, inicio))
+                        batch.set(bucket_ref, dict(_como_incrementos(contadores), inicio=inicio), merge=True)
+                    
+                    tentados.update(ref.id for ref, _ in novos)
+                    batch.commit()
+                break
+            except Exception:
+                if tentativa == tentativas - 1:
+                    raise
+                time.sleep(0.5 * 2 ** tentativa)
+        
+        aplicados = existentes & tentados
+        resultado['gravados'] += len(novos) + len(aplicados)
+        resultado['duplicados'] += len(existentes) - len(aplicados)
+        
+        for doc_id, dados in bloco:
+            if dados['tipo'] == 'pesquisa' and (doc_id not in existentes or doc_id in aplicados):
+                self.sketches.registrar(dados['material'])
+    
+    # ========================================
+    # ROLLUPS (AGREGADOS POR HORA/DIA)
+    # ========================================
+    
+    def _gravar_evento(self, dados):
+        """
+        Grava o evento bruto e incrementa os buckets de hora e dia
+        no mesmo WriteBatch (um único round trip)
+        """
+        momento = dados['timestamp']
+        contadores = _contadores_evento(dados, firestore.Increment(1))
+        
+        self._conferir_banco_novo()
+        
+        batch = self.db.batch()
+        batch.create(self.db.collection('bigdata_eventos').document(_id_evento(dados)), dados)
+        
+        for colecao, inicio in _buckets_do_momento(momento):
+            bucket_ref = self.db.collection(colecao).document(_id_bucket(colecao, inicio))
+            batch.set(bucket_ref, dict(contadores, inicio=inicio), merge=True)
+        
+        batch.commit()
+    
+    def reconstruir_rollups(self, data_inicio, data_fim):
+        """
+        Recalcula os buckets a partir dos eventos brutos
+        Use uma vez para eventos registrados antes dos rollups existirem
+        
+        O período é expandido para dias inteiros, para que os buckets
+        diários fiquem completos. Se o período começa no evento mais
+        antigo (ou antes), grava a marca de cobertura e os relatórios
+        passam a ler os rollups
+        
+        Returns:
+            int com a quantidade de buckets gravados
+        """
+        data_inicio = _inicio_do_dia(data_inicio)
+        data_fim = _inicio_do_dia(data_fim) + timedelta(days=1)
+        
+        eventos_ref = self.db.collection('bigdata_eventos')
+        query = eventos_ref.where('timestamp', '>=', data_inicio).where('timestamp', '<', data_fim)
+        
+        buckets = {}
+        for doc in query.stream():
+            evento = doc.to_dict()
+            momento = evento.get('timestamp')
+            if not hasattr(momento, 'replace'):
+                continue
+            momento = momento.replace(tzinfo=None)
             
-            # Horários
-            hora = evento.get('hora', 0)
-            relatorio['horarios_pico'][hora] = relatorio['horarios_pico'].get(hora, 0) + 1
+            for chave in _buckets_do_momento(momento):
+                bucket = buckets.setdefault(chave, {})
+                _somar_contadores(bucket, _contadores_evento(evento, 1))
+        
+        batch = self.db.batch()
+        pendentes = 0
+        for (colecao, inicio), contadores in buckets.items():
+            bucket_ref = self.db.collection(colecao).document(_id_bucket(colecao, inicio))
+            batch.set(bucket_ref, dict(contadores, inicio=inicio))
+            pendentes += 1
+            if pendentes == LIMITE_BATCH:
+                batch.commit()
+                batch = self.db.batch()
+                pendentes = 0
+        
+        if pendentes:
+            batch.commit()
+        
+        primeiro = self._primeiro_evento()
+        if primeiro is None or data_inicio <= primeiro:
+            self._marcar_rollups_completos()
+        
+        _CACHE_RELATORIOS.limpar()
+        return len(buckets)
+    
+    def _primeiro_evento(self):
+        """Timestamp (sem fuso) do evento bruto mais antigo, ou None"""
+        eventos_ref = self.db.collection('bigdata_eventos')
+        for doc in eventos_ref.order_by('timestamp').limit(1).stream():
+            momento = doc.to_dict().get('timestamp')
+            if hasattr(momento, 'replace'):
+                return momento.replace(tzinfo=None)
+        return None
+    
+    def _marcar_rollups_completos(self):
+        self.db.collection(COLECAO_ROLLUPS_META).document(DOC_COBERTURA).set({
+            'completo': True,
+            'verificadoEm': datetime.now()
+        })
+        _COBERTURA_POR_DB[id(self.db)] = (True, time.monotonic())
+    
+    def _conferir_banco_novo(self):
+        """
+        Uma vez por processo, antes da primeira gravação: banco sem nenhum
+        evento bruto já nasce coberto (todo evento gravado daqui em diante
+        soma nos buckets)
+        """
+        if id(self.db) in _BANCOS_CONFERIDOS:
+            return
+        _BANCOS_CONFERIDOS.add(id(self.db))
+        
+        if not self.rollups_cobrem_historico() and self._primeiro_evento() is None:
+            self._marcar_rollups_completos()
+    
+    def _usa_rollups(self):
+        return self.usar_rollups and self.rollups_cobrem_historico()
+    
+    def rollups_cobrem_historico(self):
+        """
+        Diz se os buckets cobrem todos os eventos brutos
+        
+        Só a marca bigdata_rollups_meta/cobertura conta: ela é gravada por
+        reconstruir_rollups() (backfill desde o evento mais antigo) ou na
+        primeira gravação de um banco ainda vazio. Até lá os relatórios
+        leem os eventos brutos.
+        
+        A resposta fica em cache no processo: positiva para sempre,
+        negativa por INTERVALO_COBERTURA segundos (para enxergar um
+        backfill feito por outro processo)
+        """
+        completo, lido_em = _COBERTURA_POR_DB.get(id(self.db), (False, None))
+        if completo or (lido_em is not None and time.monotonic() - lido_em < INTERVALO_COBERTURA):
+            return completo
+        
+        meta = self.db.collection(COLECAO_ROLLUPS_META).document(DOC_COBERTURA).get()
+        completo = meta.exists and bool(meta.to_dict().get('completo'))
+        _COBERTURA_POR_DB[id(self.db)] = (completo, time.monotonic())
+        return completo
+    
+    def _stream_rollups(self, data_inicio, data_fim):
+        """
+        Contadores do período [data_inicio, data_fim] a partir dos buckets:
+        dias inteiros vêm dos buckets diários, horas inteiras dos horários
+        e as frações de hora nas pontas de uma consulta aos eventos brutos
+        (então o total bate com a consulta direta aos eventos)
+        """
+        # Horas inteiras dentro do período: [hora_inicio, hora_fim)
+        hora_inicio = _inicio_da_hora(data_inicio)
+        if hora_inicio < data_inicio:
+            hora_inicio += timedelta(hours=1)
+        hora_fim = _inicio_da_hora(data_fim)
+        
+        if hora_inicio >= hora_fim:
+            yield from self._stream_contadores_brutos(data_inicio, data_fim)
+            return
+        
+        yield from self._stream_contadores_brutos(data_inicio, hora_inicio, incluir_fim=False)
+        
+        primeiro_dia = _inicio_do_dia(hora_inicio)
+        if primeiro_dia < hora_inicio:
+            primeiro_dia += timedelta(days=1)
+        fim_dias = _inicio_do_dia(hora_fim)
+        
+        intervalos_hora = []
+        if primeiro_dia < fim_dias:
+            dias_ref = self.db.collection(COLECAO_ROLLUPS_DIA)
+            query = dias_ref.where('inicio', '>=', primeiro_dia).where('inicio', '<', fim_dias)
+            for doc in query.stream():
+                yield doc.to_dict()
             
-            # Dias da semana
-            dia = evento.get('dia_semana', 0)
-            relatorio['dias_semana_ativos'][dia] = relatorio['dias_semana_ativos'].get(dia, 0) + 1
-        
-        # Ordenar tops
-        relatorio['materiais_mais_pesquisados'] = sorted(
-            relatorio['materiais_mais_pesquisados'].items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:20]
-        
-        relatorio['categorias_mais_buscadas'] = sorted(
-            relatorio['categorias_mais_buscadas'].items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
-        
-        relatorio['intencoes_compra']['cupons_mais_desejados'] = sorted(
-            relatorio['intencoes_compra']['cupons_mais_desejados'].items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
-        
-        # Gerar insights automáticos
-        if relatorio['materiais_mais_pesquisados']:
-            top_material = relatorio['materiais_mais_pesquisados'][0]
-            relatorio['insights'].append({
-                'tipo': 'material_popular',
-                'titulo': 'Material Mais Procurado',
-                'descricao': f"'{top_material[0]}' foi pesquisado {top_material[1]} vezes",
-                'recomendacao': f"Focar campanhas educacionais sobre descarte de {top_material[0]}"
-            })
-        
-        if relatorio['horarios_pico']:
-            horario_pico = max(relatorio['horarios_pico'].items(), key=lambda x: x[1])
-            relatorio['insights'].append({
-                'tipo': 'horario_engajamento',
-                'titulo': 'Horário de Maior Engajamento',
-                'descricao': f"Maior atividade às {horario_pico[0]}h ({horario_pico[1]} eventos)",
-                'recomendacao': "Agendar notificações e campanhas neste horário"
-            })
-        
-        if relatorio['intencoes_compra']['sem_pontos_suficientes'] > 0:
-            taxa = (relatorio['intencoes_compra']['sem_pontos_suficientes'] / 
-                   relatorio['intencoes_compra']['total'] * 100)
-            relatorio['insights'].append({
-                'tipo': 'barreira_pontos',
-                'titulo': 'Barreira de Pontos Identificada',
-                'descricao': f"{taxa:.1f}% das intenções não têm pontos suficientes",
-                'recomendacao': "Considerar criar cupons de menor valor ou promoções"
-            })
-        
-        return relatorio
+            intervalos_hora.append((hora_inicio, primeiro_dia))
+            intervalos_hora.append((fim_dias, hora_fim))
+        else:
+            intervalos_hora.append((hora_inicio, hora_fim))
+        
+        horas_ref = self.db.collection(COLECAO_ROLLUPS_HORA)
+        for inicio, fim in intervalos_hora:
+            if inicio >= fim:
+                continue
+            query = horas_ref.where('inicio', '>=', inicio).where('inicio', '<', fim)
+            for doc in query.stream():
+                yield doc.to_dict()
+        
+        yield from self._stream_contadores_brutos(hora_fim, data_fim)
+    
+    def _stream_contadores_brutos(self, data_inicio, data_fim, incluir_fim=True):
+        """Contadores somados dos eventos brutos do período (um único dict)"""
+        if data_inicio > data_fim or (data_inicio == data_fim and not incluir_fim):
+            return
+        eventos_ref = self.db.collection('bigdata_eventos')
+        query = eventos_ref.where('timestamp', '>=', data_inicio).where('timestamp', '<=' if incluir_fim else '<', data_fim)
+        contadores = self._agregar_eventos(doc.to_dict() for doc in query.stream())
+        if contadores:
+            yield contadores
+    
+    def _agregar_eventos(self, eventos):
+        """Soma os contadores de eventos brutos (NumPy se motor_vetorizado)"""
+        if self.motor_vetorizado:
+            return agregar_colunas(carregar_colunas(eventos))
+        
+        contadores = {}
+        for evento in eventos:
+            _somar_contadores(contadores, _contadores_evento(evento, 1))
+        return contadores
+    
+    # ========================================
+    # RELATÓRIOS
+    # ========================================
+    
+    def tendencias_materiais(self, top=20):
+        """
+        Top materiais e materiais distintos de todo o histórico,
+        a partir dos sketches (memória constante, erro limitado)
+        
+        Returns:
+            dict com materiais_mais_pesquisados, total_pesquisas
+            e materiais_distintos
+        """
+        return self.sketches.resumo(top)
+    
+    def _watermark(self):
+        """
+        Marca d'água dos dados: ID do evento mais recente (1 leitura)
+        Usada nas chaves do cache de relatórios
+        """
+        eventos_ref = self.db.collection('bigdata_eventos')
+        query = eventos_ref.order_by('timestamp', direction=firestore.Query.DESCENDING).limit(1)
+        
+        for doc in query.stream():
+            return doc.id
+        return None
+    
+    def contar_eventos(self, periodo_dias=30):
+        """
+        Conta os eventos dos últimos X dias sem montar o relatório
+        
+        Usa a mesma fonte do relatório (e da amostra do pacote): soma
+        total_eventos dos rollups ou, sem rollups, agregação count()
+        nos eventos brutos
+        
+        Returns:
+            int com o total de eventos
+        """
+        watermark = self._watermark()
+        
+        pacote = _CACHE_RELATORIOS.get(('pacote', periodo_dias, watermark))
+        if pacote is not None:
+            return pacote['amostra']
+        
+        chave = ('amostra', periodo_dias, watermark)
+        total = _CACHE_RELATORIOS.get(chave)
+        if total is not None:
+            return total
+        
+        data_fim = datetime.now()
+        data_inicio = data_fim - timedelta(days=periodo_dias)
+        
+        total = 0
+        if self._usa_rollups():
+            for bucket in self._stream_rollups(data_inicio, data_fim):
+                total += bucket.get('total_eventos', 0)
+        else:
+            eventos_ref = self.db.collection('bigdata_eventos')
+            query = eventos_ref.where('timestamp', '>=', data_inicio).where('timestamp', '<=', data_fim)
+            for resultado in query.count().get():
+                total = int(resultado[0].value)
+        
+        _CACHE_RELATORIOS.set(chave, total)
+        return total
+    
+    def gerar_relatorio_tendencias(self, data_inicio, data_fim):
+        """
+        Gera relatório de tendências para venda
+        100% AGREGADO E ANÔNIMO
+        
+        Com rollups ativos (e cobrindo o histórico), lê os buckets de
+        hora/dia do período e só os eventos brutos das horas incompletas
+        nas pontas, em vez de todos os eventos brutos
+        
+        Returns:
+            dict com estatísticas agregadas
+        """
+        contadores = {}
+        
+        if self._usa_rollups():
+            for bucket in self._stream_rollups(data_inicio, data_fim):
+                _somar_contadores(contadores, bucket)
+        else:
+            # Eventos brutos do período
+            contadores = next(self._stream_contadores_brutos(data_inicio, data_fim), {})
+        
+        return _montar_relatorio(contadores, data_inicio, data_fim)
     
     def gerar_pacote_comercial(self, periodo_dias=30):
         """
         Gera pacote de dados para venda comercial
         TOTALMENTE ANÔNIMO E AGREGADO
         
+        O pacote fica em cache até chegar um evento novo (ou expirar),
+        então exportação e projeções reaproveitam o mesmo cálculo
+        
         Args:
             periodo_dias: Últimos X dias
         
         Returns:
             dict formatado para venda
         """
+        chave = ('pacote', periodo_dias, self._watermark())
+        pacote = _CACHE_RELATORIOS.get(chave)
+        if pacote is not None:
+            return copy.deepcopy(pacote)
+        
         data_fim = datetime.now()
         data_inicio = data_fim - timedelta(days=periodo_dias)
         
@@ -282,7 +670,9 @@ class BigDataEcoEletronico:
             }
         }
         
-        return pacote
+        _CACHE_RELATORIOS.set(chave, pacote)
+        
+        return copy.deepcopy(pacote)
     
     def exportar_para_venda(self, periodo_dias=30, formato='json'):
         """
@@ -306,8 +696,8 @@ class BigDataEcoEletronico:
         Returns:
             dict com projeções financeiras
         """
-        # Simular venda mensal
-        pacote_mes = self.gerar_pacote_comercial(30)
+        # Simular venda mensal (só a amostra é necessária, sem montar o pacote)
+        amostra = self.contar_eventos(30)
         
         # Premissas de precificação
         valor_por_pacote = 5000  # R$ 5.000 por pacote mensal
@@ -332,12 +722,218 @@ class BigDataEcoEletronico:
                 'reserva_emergencia': valor_por_pacote * clientes_potenciais * 0.05
             },
             
-            'total_eventos_base': pacote_mes['amostra'],
-            'valor_por_evento': valor_por_pacote / pacote_mes['amostra'] if pacote_mes['amostra'] > 0 else 0
+            'total_eventos_base': amostra,
+            'valor_por_evento': valor_por_pacote / amostra if amostra > 0 else 0
         }
         
         return projecao
 
+# ========================================
+# MONTAGEM E GRAVAÇÃO DE EVENTOS
+# ========================================
+
+def _montar_evento(evento, momento):
+    """
+    Monta o documento anônimo de um evento, calculando os campos
+    de tempo a partir de um único datetime
+    
+    Args:
+        evento: dict com 'tipo' e os campos do tipo
+        momento: datetime usado se o evento não trouxer 'timestamp'
+    """
+    momento = evento.get('timestamp') or momento
+    if isinstance(momento, str):
+        momento = datetime.fromisoformat(momento)
+    
+    dados = {
+        'id': int(momento.timestamp() * 1000),
+        'tipo': evento['tipo'],
+        'timestamp': momento
+    }
+    
+    if evento['tipo'] == 'pesquisa':
+        dados['categoria'] = evento.get('categoria')
+        dados['material'] = evento.get('material')
+    else:
+        pontos_necessarios = evento.get('pontos_necessarios', 0)
+        pontos_disponiveis = evento.get('pontos_disponiveis', 0)
+        dados['categoria_cupom'] = evento.get('categoria_cupom')
+        dados['pontos_necessarios'] = pontos_necessarios
+        dados['pontos_disponiveis'] = pontos_disponiveis
+        dados['tem_pontos_suficientes'] = pontos_disponiveis >= pontos_necessarios
+    
+    # SEM DADOS PESSOAIS - APENAS AGREGADOS
+    dados['dia_semana'] = momento.weekday()  # 0-6
+    dados['hora'] = momento.hour
+    dados['mes'] = momento.month
+    
+    return dados
+
+def _id_evento(dados, chave=None):
+    """
+    ID do documento do evento
+    
+    Com chave (importação), é o hash da chave: o mesmo evento reimportado
+    gera o mesmo ID. Sem chave (evento ao vivo), milissegundos + sufixo
+    aleatório, então eventos no mesmo milissegundo não se sobrescrevem
+    """
+    if chave is not None:
+        return hashlib.sha1(chave.encode('utf-8')).hexdigest()[:24]
+    return f"{dados['id']}-{secrets.token_hex(8)}"
+
+# ========================================
+# CONTADORES E BUCKETS
+# ========================================
+
+def _inicio_do_dia(momento):
+    """Trunca um datetime para 00:00 do mesmo dia"""
+    return momento.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _inicio_da_hora(momento):
+    """Trunca um datetime para o início da hora"""
+    return momento.replace(minute=0, second=0, microsecond=0)
+
+def _buckets_do_momento(momento):
+    """Retorna (coleção, início) dos buckets de hora e dia de um evento"""
+    return [
+        (COLECAO_ROLLUPS_HORA, _inicio_da_hora(momento)),
+        (COLECAO_ROLLUPS_DIA, _inicio_do_dia(momento)),
+    ]
+
+def _id_bucket(colecao, inicio):
+    """ID do documento do bucket (ex: 2025111513 para hora, 20251115 para dia)"""
+    if colecao == COLECAO_ROLLUPS_HORA:
+        return inicio.strftime('%Y%m%d%H')
+    return inicio.strftime('%Y%m%d')
+
+def _contadores_evento(evento, um):
+    """
+    Converte um evento nos contadores que ele incrementa
+    
+    Args:
+        evento: dict do evento (pesquisa ou intencao_cupom)
+        um: valor do incremento (1 ou firestore.Increment(1))
+    
+    Returns:
+        dict aninhado no formato dos buckets (chaves sempre string)
+    """
+    tipo = evento.get('tipo', 'desconhecido')
+    
+    contadores = {
+        'total_eventos': um,
+        'eventos_por_tipo': {tipo: um},
+        'horas': {str(evento.get('hora', 0)): um},
+        'dias_semana': {str(evento.get('dia_semana', 0)): um}
+    }
+    
+    if tipo == 'pesquisa':
+        contadores['materiais'] = {str(evento.get('material', 'N/A')): um}
+        contadores['categorias'] = {str(evento.get('categoria', 'N/A')): um}
+    
+    if tipo == 'intencao_cupom':
+        chave = 'com_pontos_suficientes' if evento.get('tem_pontos_suficientes') else 'sem_pontos_suficientes'
+        contadores['intencoes'] = {'total': um, chave: um}
+        contadores['cupons'] = {str(evento.get('categoria_cupom', 'N/A')): um}
+    
+    return contadores
+
+def _somar_contadores(destino, origem):
+    """Soma (recursivamente) os contadores de origem em destino"""
+    for chave, valor in origem.items():
+        if isinstance(valor, dict):
+            _somar_contadores(destino.setdefault(chave, {}), valor)
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            destino[chave] = destino.get(chave, 0) + valor
+
+def _como_incrementos(contadores):
+    """Troca cada número dos contadores por firestore.Increment(n)"""
+    return {
+        chave: _como_incrementos(valor) if isinstance(valor, dict) else firestore.Increment(valor)
+        for chave, valor in contadores.items()
+    }
+
+def _chaves_inteiras(contagem):
+    """Converte chaves '0'..'23' dos buckets de volta para int, em ordem"""
+    return {int(k): v for k, v in sorted(contagem.items(), key=lambda x: int(x[0]))}
+
+def _montar_relatorio(contadores, data_inicio, data_fim):
+    """
+    Monta o relatório final (tops ordenados + insights) a partir
+    dos contadores somados
+    """
+    intencoes = contadores.get('intencoes', {})
+    
+    # Análises agregadas
+    relatorio = {
+        'periodo': {
+            'inicio': data_inicio.strftime('%d/%m/%Y'),
+            'fim': data_fim.strftime('%d/%m/%Y')
+        },
+        'total_eventos': contadores.get('total_eventos', 0),
+        'eventos_por_tipo': dict(contadores.get('eventos_por_tipo', {})),
+        'materiais_mais_pesquisados': dict(contadores.get('materiais', {})),
+        'categorias_mais_buscadas': dict(contadores.get('categorias', {})),
+        'horarios_pico': _chaves_inteiras(contadores.get('horas', {})),
+        'dias_semana_ativos': _chaves_inteiras(contadores.get('dias_semana', {})),
+        'intencoes_compra': {
+            'total': intencoes.get('total', 0),
+            'com_pontos_suficientes': intencoes.get('com_pontos_suficientes', 0),
+            'sem_pontos_suficientes': intencoes.get('sem_pontos_suficientes', 0),
+            'cupons_mais_desejados': dict(contadores.get('cupons', {}))
+        },
+        'insights': []
+    }
+    
+    # Ordenar tops
+    relatorio['materiais_mais_pesquisados'] = sorted(
+        relatorio['materiais_mais_pesquisados'].items(),
+        key=lambda x: x[1],
+        reverse=True
+    )[:20]
+    
+    relatorio['categorias_mais_buscadas'] = sorted(
+        relatorio['categorias_mais_buscadas'].items(),
+        key=lambda x: x[1],
+        reverse=True
+    )
+    
+    relatorio['intencoes_compra']['cupons_mais_desejados'] = sorted(
+        relatorio['intencoes_compra']['cupons_mais_desejados'].items(),
+        key=lambda x: x[1],
+        reverse=True
+    )
+    
+    # Gerar insights automáticos
+    if relatorio['materiais_mais_pesquisados']:
+        top_material = relatorio['materiais_mais_pesquisados'][0]
+        relatorio['insights'].append({
+            'tipo': 'material_popular',
+            'titulo': 'Material Mais Procurado',
+            'descricao': f"'{top_material[0]}' foi pesquisado {top_material[1]} vezes",
+            'recomendacao': f"Focar campanhas educacionais sobre descarte de {top_material[0]}"
+        })
+    
+    if relatorio['horarios_pico']:
+        horario_pico = max(relatorio['horarios_pico'].items(), key=lambda x: x[1])
+        relatorio['insights'].append({
+            'tipo': 'horario_engajamento',
+            'titulo': 'Horário de Maior Engajamento',
+            'descricao': f"Maior atividade às {horario_pico[0]}h ({horario_pico[1]} eventos)",
+            'recomendacao': "Agendar notificações e campanhas neste horário"
+        })
+    
+    if relatorio['intencoes_compra']['sem_pontos_suficientes'] > 0:
+        taxa = (relatorio['intencoes_compra']['sem_pontos_suficientes'] / 
+               relatorio['intencoes_compra']['total'] * 100)
+        relatorio['insights'].append({
+            'tipo': 'barreira_pontos',
+            'titulo': 'Barreira de Pontos Identificada',
+            'descricao': f"{taxa:.1f}% das intenções não têm pontos suficientes",
+            'recomendacao': "Considerar criar cupons de menor valor ou promoções"
+        })
+    
+    return relatorio
+
 # Exemplo de uso
 def exemplo_uso():
     """Exemplo de como usar o sistema"""
@@ -351,6 +947,16 @@ def exemplo_uso():
     # Registrar intenção de compra
     # bd.registrar_intencao_compra_cupom('Matemática', 45, 40, consentimento=True)
     
+    # Recalcular rollups de eventos antigos (uma única vez; até lá os
+    # relatórios leem os eventos brutos)
+    # bd.reconstruir_rollups(datetime.now() - timedelta(days=365), datetime.now())
+    
+    # Importar histórico em lote (arquivo NDJSON, um evento por linha)
+    # bd.reprocessar_spool('eventos_2025_t1.ndjson')
+    
+    # Top materiais de todo o histórico (sketches)
+    # tendencias = bd.tendencias_materiais(20)
+    
     # Gerar relatório
     # relatorio = bd.gerar_relatorio_tendencias(datetime.now() - timedelta(days=30), datetime.now())
     
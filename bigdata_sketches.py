@@ -0,0 +1,362 @@
+# bigdata_sketches.py - Contagem Aproximada para o Big Data
+
+"""
+Estruturas probabilísticas (sketches) para tendências de pesquisa
+- Count-Min Sketch: frequência aproximada de qualquer material
+- Space-Saving: top-k materiais mais pesquisados
+- HyperLogLog: quantidade de materiais distintos
+- Memória constante, independente do número de eventos
+- Persistidos periodicamente no Firestore (coleção bigdata_sketches)
+"""
+
+from array import array
+from hashlib import blake2b
+import atexit
+from datetime import datetime
+import math
+import random
+import threading
+import time
+
+from firebase_admin import firestore
+
+COLECAO_SKETCHES = 'bigdata_sketches'
+
+def _hash64(valor, semente=b''):
+    """Hash estável de 64 bits (igual em todos os processos, ao contrário de hash())"""
+    digest = blake2b(str(valor).encode('utf-8'), digest_size=8, key=semente).digest()
+    return int.from_bytes(digest, 'little')
+
+# ========================================
+# COUNT-MIN SKETCH
+# ========================================
+
+class CountMinSketch:
+    """
+    Frequência aproximada: nunca subestima, superestima no máximo
+    e/largura * total com probabilidade 1 - e^-profundidade
+    """
+    
+    def __init__(self, largura=2048, profundidade=4):
+        self.largura = largura
+        self.profundidade = profundidade
+        self.total = 0
+        self.tabela = array('Q', bytes(8 * largura * profundidade))
+    
+    def _posicoes(self, item):
+        h1 = _hash64(item)
+        h2 = _hash64(item, b'cms') | 1
+        for linha in range(self.profundidade):
+            yield linha * self.largura + (h1 + linha * h2) % self.largura
+    
+    def adicionar(self, item, quantidade=1):
+        self.total += quantidade
+        for posicao in self._posicoes(item):
+            self.tabela[posicao] += quantidade
+    
+    def estimar(self, item):
+        return min(self.tabela[posicao] for posicao in self._posicoes(item))
+    
+    def mesclar(self, outro):
+        for i, valor in enumerate(outro.tabela):
+            self.tabela[i] += valor
+        self.total += outro.total
+    
+    def to_dict(self):
+        return {
+            'largura': self.largura,
+            'profundidade': self.profundidade,
+            'total': self.total,
+            'tabela': self.tabela.tobytes()
+        }
+    
+    @classmethod
+    def from_dict(cls, dados):
+        sketch = cls(dados['largura'], dados['profundidade'])
+        sketch.total = dados.get('total', 0)
+        sketch.tabela = array('Q', bytes(dados['tabela']))
+        return sketch
+
+# ========================================
+# SPACE-SAVING (TOP-K)
+# ========================================
+
+class SpaceSaving:
+    """
+    Top-k em memória fixa: guarda no máximo k itens com (contagem, erro)
+    Qualquer item com frequência > total/k está garantidamente na lista
+    """
+    
+    def __init__(self, k=100):
+        self.k = k
+        self.contadores = {}
+    
+    def adicionar(self, item, quantidade=1):
+        item = str(item)
+        if item in self.contadores:
+            self.contadores[item][0] += quantidade
+        elif len(self.contadores) < self.k:
+            self.contadores[item] = [quantidade, 0]
+        else:
+            # Substitui o menor contador (herdando a contagem dele como erro)
+            menor = min(self.contadores, key=lambda x: self.contadores[x][0])
+            minimo = self.contadores.pop(menor)[0]
+            self.contadores[item] = [minimo + quantidade, minimo]
+    
+    def top(self, n=20):
+        """Lista [(item, contagem_estimada)] ordenada do maior para o menor"""
+        itens = sorted(self.contadores.items(), key=lambda x: x[1][0], reverse=True)
+        return [(item, contagem) for item, (contagem, _) in itens[:n]]
+    
+    def mesclar(self, outro):
+        minimo_self = min((c[0] for c in self.contadores.values()), default=0) if len(self.contadores) >= self.k else 0
+        minimo_outro = min((c[0] for c in outro.contadores.values()), default=0) if len(outro.contadores) >= outro.k else 0
+        
+        mesclados = {}
+        for item in set(self.contadores) | set(outro.contadores):
+            a = self.contadores.get(item, [minimo_self, minimo_self])
+            b = outro.contadores.get(item, [minimo_outro, minimo_outro])
+            mesclados[item] = [a[0] + b[0], a[1] + b[1]]
+        
+        maiores = sorted(mesclados.items(), key=lambda x: x[1][0], reverse=True)[:self.k]
+        self.contadores = dict(maiores)
+    
+    def to_dict(self):
+        return {
+            'k': self.k,
+            'itens': [
+                {'item': item, 'contagem': contagem, 'erro': erro}
+                for item, (contagem, erro) in self.contadores.items()
+            ]
+        }
+    
+    @classmethod
+    def from_dict(cls, dados):
+        sketch = cls(dados['k'])
+        for registro in dados.get('itens', []):
+            sketch.contadores[registro['item']] = [registro['contagem'], registro['erro']]
+        return sketch
+
+# ========================================
+# HYPERLOGLOG
+# ========================================
+
+class HyperLogLog:
+    """Cardinalidade aproximada com erro padrão ~1.04/sqrt(2^p)"""
+    
+    def __init__(self, p=12):
+        self.p = p
+        self.m = 1 << p
+        self.registros = bytearray(self.m)
+    
+    def adicionar(self, item):
+        h = _hash64(item, b'hll')
+        indice = h & (self.m - 1)
+        resto = h >> self.p
+        rank = (64 - self.p) - resto.bit_length() + 1
+        if rank > self.registros[indice]:
+            self.registros[indice] = rank
+    
+    def estimar(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimativa = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registros)
+        
+        zeros = self.registros.count(0)
+        if estimativa <= 2.5 * self.m and zeros:
+            # Correção para cardinalidades pequenas (linear counting)
+            estimativa = self.m * math.log(self.m / zeros)
+        
+        return int(round(estimativa))
+    
+    def mesclar(self, outro):
+        for i, r in enumerate(outro.registros):
+            if r > self.registros[i]:
+                self.registros[i] = r
+    
+    def to_dict(self):
+        return {'p': self.p, 'registros': bytes(self.registros)}
+    
+    @classmethod
+    def from_dict(cls, dados):
+        sketch = cls(dados['p'])
+        sketch.registros = bytearray(dados['registros'])
+        return sketch
+
+# ========================================
+# GERENCIADOR (ATUALIZAÇÃO + PERSISTÊNCIA)
+# ========================================
+
+class SketchesMateriais:
+    """
+    Sketches dos materiais pesquisados
+    
+    Cada processo acumula um delta local; persistir() mescla o delta no
+    documento do Firestore dentro de uma transação, então vários servidores
+    podem atualizar o mesmo sketch sem perder contagens. Se a gravação
+    falhar, o delta volta para a memória e entra na próxima tentativa
+    """
+    
+    def __init__(self, db, documento='materiais', intervalo_segundos=60, max_pendentes=1000):
+        self.db = db
+        self.documento = documento
+        self.intervalo_segundos = intervalo_segundos
+        self.max_pendentes = max_pendentes
+        self._lock = threading.Lock()
+        self._proxima_tentativa = 0.0
+        self._resetar_delta()
+    
+    def _resetar_delta(self):
+        self.cms = CountMinSketch()
+        self.topk = SpaceSaving()
+        self.hll = HyperLogLog()
+        self.pendentes = 0
+        self.ultima_persistencia = time.monotonic()
+    
+    def registrar(self, material):
+        """Atualiza os sketches com uma pesquisa e persiste se for a hora"""
+        with self._lock:
+            self.cms.adicionar(material)
+            self.topk.adicionar(material)
+            self.hll.adicionar(material)
+            self.pendentes += 1
+        
+        if self._hora_de_persistir():
+            try:
+                self.persistir()
+            except Exception as e:
+                # Falha ao gravar o sketch não pode derrubar a pesquisa do aluno
+                print(f"⚠️ Sketches não persistidos (nova tentativa em {self.intervalo_segundos}s): {e}")
+    
+    def _hora_de_persistir(self):
+        agora = time.monotonic()
+        if agora < self._proxima_tentativa:
+            return False
+        return (self.pendentes >= self.max_pendentes or
+                agora - self.ultima_persistencia >= self.intervalo_segundos)
+    
+    def _ref(self):
+        return self.db.collection(COLECAO_SKETCHES).document(self.documento)
+    
+    def persistir(self):
+        """
+        Mescla o delta local no documento do Firestore (transação)
+        
+        Se a transação falhar, o delta é mesclado de volta no delta local
+        (nada se perde) e a exceção é repassada
+        """
+        with self._lock:
+            if not self.pendentes:
+                self.ultima_persistencia = time.monotonic()
+                return
+            delta = (self.cms, self.topk, self.hll)
+            pendentes = self.pendentes
+            self._resetar_delta()
+        
+        @firestore.transactional
+        def mesclar(transaction):
+            cms, topk, hll = _carregar_ou_vazio(self._ref().get(transaction=transaction))
+            cms.mesclar(delta[0])
+            topk.mesclar(delta[1])
+            hll.mesclar(delta[2])
+            transaction.set(self._ref(), {
+                'cms': cms.to_dict(),
+                'topk': topk.to_dict(),
+                'hll': hll.to_dict(),
+                'atualizadoEm': datetime.now()
+            })
+        
+        try:
+            mesclar(self.db.transaction())
+        except Exception:
+            with self._lock:
+                self.cms.mesclar(delta[0])
+                self.topk.mesclar(delta[1])
+                self.hll.mesclar(delta[2])
+                self.pendentes += pendentes
+                self._proxima_tentativa = time.monotonic() + self.intervalo_segundos
+            raise
+    
+    def _estado_completo(self):
+        """Sketch persistido + delta local ainda não gravado"""
+        cms, topk, hll = _carregar_ou_vazio(self._ref().get())
+        with self._lock:
+            cms.mesclar(self.cms)
+            topk.mesclar(self.topk)
+            hll.mesclar(self.hll)
+        return cms, topk, hll
+    
+    def resumo(self, n=20):
+        """
+        Returns:
+            dict com top-n materiais, total de pesquisas e materiais distintos
+        """
+        cms, topk, hll = self._estado_completo()
+        return {
+            'materiais_mais_pesquisados': topk.top(n),
+            'total_pesquisas': cms.total,
+            'materiais_distintos': hll.estimar()
+        }
+
+_SKETCHES_POR_DB = {}
+_SKETCHES_LOCK = threading.Lock()
+
+def obter_sketches(db):
+    """
+    Retorna o SketchesMateriais do processo para este client
+    (um delta por processo, persistido também ao encerrar)
+    """
+    with _SKETCHES_LOCK:
+        sketches = _SKETCHES_POR_DB.get(id(db))
+        if sketches is None:
+            sketches = SketchesMateriais(db)
+            _SKETCHES_POR_DB[id(db)] = sketches
+            atexit.register(sketches.persistir)
+        return sketches
+
+def _carregar_ou_vazio(snapshot):
+    if not snapshot.exists:
+        return CountMinSketch(), SpaceSaving(), HyperLogLog()
+    dados = snapshot.to_dict()
+    return (
+        CountMinSketch.from_dict(dados['cms']),
+        SpaceSaving.from_dict(dados['topk']),
+        HyperLogLog.from_dict(dados['hll'])
+    )
+
+# ========================================
+# TESTES DE PRECISÃO E VAZÃO
+# ========================================
+
+def testar_sketches(quantidade=200_000, materiais_distintos=5_000, seed=7):
+    """Mede erro e throughput dos sketches contra contagem exata (distribuição Zipf)"""
+    rng = random.Random(seed)
+    pesos = [1 / (i + 1) for i in range(materiais_distintos)]
+    fluxo = rng.choices([f"material_{i}" for i in range(materiais_distintos)], weights=pesos, k=quantidade)
+    
+    exato = {}
+    for item in fluxo:
+        exato[item] = exato.get(item, 0) + 1
+    
+    cms, topk, hll = CountMinSketch(), SpaceSaving(), HyperLogLog()
+    
+    inicio = time.perf_counter()
+    for item in fluxo:
+        cms.adicionar(item)
+        topk.adicionar(item)
+        hll.adicionar(item)
+    duracao = time.perf_counter() - inicio
+    
+    top_exato = [item for item, _ in sorted(exato.items(), key=lambda x: x[1], reverse=True)[:20]]
+    top_sketch = [item for item, _ in topk.top(20)]
+    erro_cms = max(cms.estimar(item) - n for item, n in exato.items())
+    erro_hll = abs(hll.estimar() - len(exato)) / len(exato) * 100
+    
+    print("🧪 TESTANDO SKETCHES DE MATERIAIS\n")
+    print(f"Eventos: {quantidade:,} | Distintos reais: {len(exato):,}")
+    print(f"Throughput: {quantidade / duracao:,.0f} eventos/s")
+    print(f"Top-20 em comum com o exato: {len(set(top_exato) & set(top_sketch))}/20")
+    print(f"Count-Min: maior superestimativa = {erro_cms} (limite e/w*N = {math.e / cms.largura * quantidade:.0f})")
+    print(f"HyperLogLog: {hll.estimar():,} distintos ({erro_hll:.2f}% de erro)")
+
+if __name__ == "__main__":
+    testar_sketches()
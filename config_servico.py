@@ -0,0 +1,120 @@
+# config_servico.py - Configurações em Memória com Listener
+
+"""
+Serviço de configuração do processo
+- Carrega todos os documentos da coleção 'config' uma vez
+- Um snapshot listener mantém a cópia em memória atualizada
+- Leituras (trimestreAtual, cupom_bazar liberado, ...) não vão ao Firestore
+- Escritas passam por aqui e já aparecem na memória (sem esperar o listener)
+"""
+
+import copy
+import threading
+
+COLECAO_CONFIG = 'config'
+
+# Tempo máximo esperando o primeiro snapshot antes de ler direto
+TIMEOUT_CARGA = 5.0
+
+class ServicoConfig:
+    """
+    Cópia em memória da coleção config
+    
+    Uso:
+        config = obter_servico_config(db)
+        trimestre = config.valor('sistema', 'trimestreAtual', 1)
+        config.definir('sistema', {'trimestreAtual': 2})
+    """
+    
+    def __init__(self, db):
+        self.db = db
+        self._docs = {}
+        # {doc_id: update_time da última gravação feita por este processo}
+        self._escritas = {}
+        self._lock = threading.Lock()
+        self._carregado = threading.Event()
+        self._espera = TIMEOUT_CARGA
+        self._watch = None
+    
+    def iniciar(self):
+        self._watch = self.db.collection(COLECAO_CONFIG).on_snapshot(self._ao_mudar)
+        return self
+    
+    def parar(self):
+        if self._watch:
+            self._watch.unsubscribe()
+            self._watch = None
+    
+    def _ao_mudar(self, docs, changes, read_time):
+        # O snapshot traz a coleção inteira a cada mudança
+        novos = {doc.id: doc.to_dict() for doc in docs}
+        vistos = {doc.id: getattr(doc, 'update_time', None) for doc in docs}
+        
+        with self._lock:
+            # Snapshot que já estava a caminho antes de um definir() local
+            # não pode desfazer a gravação: mantém a cópia local até o
+            # listener entregar uma versão igual ou mais nova do documento
+            for doc_id, escrito_em in list(self._escritas.items()):
+                visto = vistos.get(doc_id)
+                if visto is not None and visto >= escrito_em:
+                    del self._escritas[doc_id]
+                elif visto is None and read_time is not None and read_time >= escrito_em:
+                    # Apagado depois da gravação local
+                    del self._escritas[doc_id]
+                elif doc_id in self._docs:
+                    novos[doc_id] = self._docs[doc_id]
+            self._docs = novos
+        self._carregado.set()
+    
+    def obter(self, doc_id):
+        """
+        Cópia do documento config/{doc_id}, ou None se não existe
+        
+        Se o listener ainda não entregou o primeiro snapshot (ou não
+        conseguiu), lê o documento direto uma vez
+        """
+        if not self._carregado.wait(self._espera):
+            # Só a primeira leitura espera; as seguintes vão direto
+            self._espera = 0
+            doc = self.db.collection(COLECAO_CONFIG).document(doc_id).get()
+            return doc.to_dict() if doc.exists else None
+        
+        with self._lock:
+            dados = self._docs.get(doc_id)
+            return copy.deepcopy(dados) if dados is not None else None
+    
+    def valor(self, doc_id, campo, padrao=None):
+        dados = self.obter(doc_id)
+        if dados is None:
+            return padrao
+        return dados.get(campo, padrao)
+    
+    def definir(self, doc_id, dados, merge=False):
+        """
+        Grava config/{doc_id} e atualiza a memória na hora
+        
+        O update_time da gravação protege a cópia local contra snapshots
+        mais antigos que ainda cheguem pelo listener
+        """
+        resultado = self.db.collection(COLECAO_CONFIG).document(doc_id).set(dados, merge=merge)
+        escrito_em = getattr(resultado, 'update_time', None)
+        
+        with self._lock:
+            if escrito_em is not None:
+                self._escritas[doc_id] = escrito_em
+            if merge and doc_id in self._docs:
+                self._docs[doc_id] = {**self._docs[doc_id], **dados}
+            else:
+                self._docs[doc_id] = dict(dados)
+
+_SERVICOS_POR_DB = {}
+_SERVICOS_LOCK = threading.Lock()
+
+def obter_servico_config(db):
+    """Retorna o ServicoConfig do processo para este client (um listener só)"""
+    with _SERVICOS_LOCK:
+        servico = _SERVICOS_POR_DB.get(id(db))
+        if servico is None:
+            servico = ServicoConfig(db).iniciar()
+            _SERVICOS_POR_DB[id(db)] = servico
+        return servico
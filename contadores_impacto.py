@@ -0,0 +1,209 @@
+# contadores_impacto.py - Contadores de Impacto Ambiental Materializados
+
+"""
+Totais de impacto mantidos incrementalmente no Firestore
+- usuarios/{id}.impacto: totais do aluno (chumbo, CO₂, água, ...)
+- impacto_rollups/turma_{turma} e impacto_rollups/escola
+- Atualizados na mesma transação que aprova o descarte
+  (status + pontos + impacto), então nunca contam duas vezes
+- Painéis de impacto viram leituras O(1) de um documento
+"""
+
+from datetime import datetime
+
+from firebase_admin import firestore
+
+from registro_materiais import carregar_registro, CAMPOS_IMPACTO
+
+COLECAO_ROLLUPS_IMPACTO = 'impacto_rollups'
+DOC_ESCOLA = 'escola'
+
+LIMITE_BATCH = 500
+
+# Nome de cada contador (mesma ordem de CAMPOS_IMPACTO)
+CAMPOS_CONTADOR = tuple('peso_total_kg' if campo == 'peso_medio_kg' else campo for campo in CAMPOS_IMPACTO)
+
+def impacto_zerado():
+    impacto = {campo: 0.0 for campo in CAMPOS_CONTADOR}
+    impacto['quantidade'] = 0
+    return impacto
+
+def impacto_do_descarte(descarte):
+    """
+    Impacto de um descarte (dict) pelos fatores do registro
+    
+    Usa materialCorrigido quando o admin corrigiu um descarte customizado;
+    material sem fatores conta só na quantidade
+    """
+    quantidade = descarte.get('quantidade', 0) or 0
+    impacto = impacto_zerado()
+    impacto['quantidade'] = quantidade
+    
+    material = carregar_registro().buscar(
+        str(descarte.get('materialCorrigido') or descarte.get('material') or '')
+    )
+    if material and material['vetor_impacto'] is not None:
+        for campo, fator in zip(CAMPOS_CONTADOR, material['vetor_impacto']):
+            impacto[campo] = fator * quantidade
+    
+    return impacto
+
+def _doc_turma(turma):
+    return f'turma_{turma}'
+
+# ========================================
+# APROVAÇÃO (TRANSAÇÃO)
+# ========================================
+
+@firestore.transactional
+def _aprovar_em_transacao(transaction, db, descarte_id, material_corrigido=None):
+    descarte_ref = db.collection('descartes').document(str(descarte_id))
+    descarte_doc = descarte_ref.get(transaction=transaction)
+    
+    if not descarte_doc.exists:
+        return False, "❌ Descarte não encontrado!"
+    
+    descarte = descarte_doc.to_dict()
+    if descarte.get('status') != 'Pendente':
+        return False, f"⚠️ Descarte já está {descarte.get('status')}"
+    
+    if material_corrigido:
+        descarte['materialCorrigido'] = material_corrigido
+    
+    user_ref = db.collection('usuarios').document(str(descarte['usuarioId']))
+    user_doc = user_ref.get(transaction=transaction)
+    turma = user_doc.to_dict().get('turma') if user_doc.exists else None
+    
+    impacto = impacto_do_descarte(descarte)
+    incrementos = {campo: firestore.Increment(valor) for campo, valor in impacto.items()}
+    rollups = db.collection(COLECAO_ROLLUPS_IMPACTO)
+    
+    # Todas as leituras acima, todas as escritas abaixo
+    atualizacao_descarte = {
+        'status': 'Aprovado',
+        'dataAprovacao': datetime.now()
+    }
+    if material_corrigido:
+        atualizacao_descarte['materialCorrigido'] = material_corrigido
+        atualizacao_descarte['dataCorrecao'] = atualizacao_descarte['dataAprovacao']
+    transaction.update(descarte_ref, atualizacao_descarte)
+    
+    if user_doc.exists:
+        atualizacao = {'pontos': firestore.Increment(descarte.get('pontos', 0))}
+        atualizacao.update({f'impacto.{campo}': inc for campo, inc in incrementos.items()})
+        transaction.update(user_ref, atualizacao)
+    
+    if turma:
+        transaction.set(rollups.document(_doc_turma(turma)), {
+            'turma': turma,
+            'impacto': incrementos,
+            'atualizadoEm': datetime.now()
+        }, merge=True)
+    
+    transaction.set(rollups.document(DOC_ESCOLA), {
+        'impacto': incrementos,
+        'atualizadoEm': datetime.now()
+    }, merge=True)
+    
+    return True, "✅ Descarte aprovado!"
+
+def aprovar_descarte_com_impacto(db, descarte_id, material_corrigido=None):
+    """
+    Aprova um descarte pendente: status, pontos do aluno e contadores
+    de impacto (aluno, turma, escola) numa única transação
+    
+    material_corrigido: material do registro escolhido pelo admin para um
+    descarte customizado; gravado (materialCorrigido) no mesmo commit e
+    usado no cálculo do impacto
+    
+    Returns:
+        (sucesso, mensagem)
+    """
+    if material_corrigido and material_corrigido not in carregar_registro().materiais:
+        return False, f"❌ Material desconhecido: {material_corrigido}"
+    return _aprovar_em_transacao(db.transaction(), db, descarte_id, material_corrigido)
+
+# ========================================
+# LEITURA (O(1))
+# ========================================
+
+def _completar(impacto):
+    completo = impacto_zerado()
+    completo.update(impacto or {})
+    return completo
+
+def impacto_do_aluno(usuario):
+    """Totais do aluno a partir do próprio documento já carregado (dict)"""
+    return _completar(usuario.get('impacto'))
+
+def impacto_da_turma(db, turma):
+    doc = db.collection(COLECAO_ROLLUPS_IMPACTO).document(_doc_turma(turma)).get()
+    return _completar(doc.to_dict().get('impacto') if doc.exists else None)
+
+def impacto_da_escola(db):
+    doc = db.collection(COLECAO_ROLLUPS_IMPACTO).document(DOC_ESCOLA).get()
+    return _completar(doc.to_dict().get('impacto') if doc.exists else None)
+
+# ========================================
+# RECONSTRUÇÃO
+# ========================================
+
+def reconstruir_contadores_impacto(db):
+    """
+    Recalcula do zero todos os contadores a partir dos descartes aprovados
+    (backfill para dados antigos ou após mudar fatores no registro)
+    
+    Deve rodar sem aprovações acontecendo ao mesmo tempo, pois sobrescreve
+    os totais
+    
+    Returns:
+        dict com nº de alunos e turmas gravados
+    """
+    turma_do_usuario = {}
+    for doc in db.collection('usuarios').stream():
+        turma_do_usuario[doc.id] = doc.to_dict().get('turma')
+    
+    por_aluno = {user_id: impacto_zerado() for user_id in turma_do_usuario}
+    por_turma = {}
+    escola = impacto_zerado()
+    
+    for doc in db.collection('descartes').where('status', '==', 'Aprovado').stream():
+        descarte = doc.to_dict()
+        impacto = impacto_do_descarte(descarte)
+        user_id = str(descarte.get('usuarioId'))
+        turma = turma_do_usuario.get(user_id)
+        
+        destinos = [escola]
+        if user_id in por_aluno:
+            destinos.append(por_aluno[user_id])
+        if turma:
+            destinos.append(por_turma.setdefault(turma, impacto_zerado()))
+        
+        for destino in destinos:
+            for campo, valor in impacto.items():
+                destino[campo] += valor
+    
+    escritas = [
+        ('update', db.collection('usuarios').document(user_id), {'impacto': impacto})
+        for user_id, impacto in por_aluno.items()
+    ]
+    escritas += [
+        ('set', db.collection(COLECAO_ROLLUPS_IMPACTO).document(_doc_turma(turma)),
+         {'turma': turma, 'impacto': impacto, 'atualizadoEm': datetime.now()})
+        for turma, impacto in por_turma.items()
+    ]
+    escritas.append(
+        ('set', db.collection(COLECAO_ROLLUPS_IMPACTO).document(DOC_ESCOLA),
+         {'impacto': escola, 'atualizadoEm': datetime.now()})
+    )
+    
+    for i in range(0, len(escritas), LIMITE_BATCH):
+        batch = db.batch()
+        for operacao, ref, dados in escritas[i:i + LIMITE_BATCH]:
+            if operacao == 'update':
+                batch.update(ref, dados)
+            else:
+                batch.set(ref, dados)
+        batch.commit()
+    
+    return {'alunos': len(por_aluno), 'turmas': len(por_turma)}
@@ -5,6 +5,7 @@
 import csv
 import io
 import json
+import secrets
 from datetime import datetime
 import streamlit as st
 
@@ -174,6 +175,24 @@ def exportar_relatorio_completo_csv(usuarios, descartes, resgates):
 # REGISTRAR EVENTO (LOG)
 # ========================================
 
+def montar_evento(tipo_evento, usuario_id, detalhes, agora=None):
+    """
+    Documento de log_eventos (mesmo formato em registrar_evento e nas
+    transações que gravam o evento junto com a operação)
+    
+    id = milissegundos + sufixo aleatório: dois eventos no mesmo
+    milissegundo não colidem; usar também como id do documento
+    """
+    agora = agora or datetime.now()
+    return {
+        'id': f"{int(agora.timestamp() * 1000)}-{secrets.token_hex(4)}",
+        'tipo': tipo_evento,
+        'usuario_id': usuario_id,
+        'timestamp': agora,
+        'timestamp_str': agora.strftime('%d/%m/%Y %H:%M:%S'),
+        'detalhes': detalhes
+    }
+
 def registrar_evento(db, tipo_evento, usuario_id, detalhes):
     """
     Registra um evento no banco de dados com timestamp exato
@@ -187,18 +206,8 @@ def registrar_evento(db, tipo_evento, usuario_id, detalhes):
         return False
     
     try:
-        evento_id = int(datetime.now().timestamp() * 1000)
-        
-        dados = {
-            'id': evento_id,
-            'tipo': tipo_evento,
-            'usuario_id': usuario_id,
-            'timestamp': datetime.now(),
-            'timestamp_str': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
-            'detalhes': detalhes
-        }
-        
-        db.collection('log_eventos').document(str(evento_id)).set(dados)
+        dados = montar_evento(tipo_evento, usuario_id, detalhes)
+        db.collection('log_eventos').document(dados['id']).set(dados)
         return True
     except:
         return False
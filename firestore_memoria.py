@@ -0,0 +1,488 @@
+# firestore_memoria.py - Firestore em Memória (Testes de Carga Locais)
+
+"""
+Cliente Firestore em memória para rodar testes sem infraestrutura
+- Mesma interface usada pelo app: collection/document, get/set/update/
+  create/delete, where/select/order_by/limit, count(), batch, get_all,
+  on_snapshot de coleção
+- Transações compatíveis com @firestore.transactional (leitura registra a
+  versão do documento; o commit aborta se alguma mudou, e o decorator
+  tenta de novo, como no servidor)
+- Entende os sentinelas do SDK (Increment, ArrayUnion, ArrayRemove,
+  SERVER_TIMESTAMP, DELETE_FIELD)
+- Só para testes: nada é persistido e não há regras de segurança/índices
+"""
+
+from datetime import datetime
+import copy
+import itertools
+import threading
+
+from google.api_core.exceptions import Aborted, AlreadyExists, NotFound
+from google.cloud.firestore_v1 import transforms
+
+LIMITE_BATCH = 500
+
+# ========================================
+# VALORES E CAMINHOS DE CAMPO
+# ========================================
+
+def _aplicar(atual, valor):
+    """Valor final de um campo (resolve os sentinelas do SDK)"""
+    if isinstance(valor, transforms.Increment):
+        return (atual or 0) + valor.value
+    if isinstance(valor, transforms.ArrayUnion):
+        lista = list(atual or [])
+        lista += [v for v in valor.values if v not in lista]
+        return lista
+    if isinstance(valor, transforms.ArrayRemove):
+        return [v for v in (atual or []) if v not in valor.values]
+    if valor is transforms.SERVER_TIMESTAMP:
+        return datetime.now()
+    if isinstance(valor, dict):
+        return _resolver(valor)
+    return copy.deepcopy(valor)
+
+def _resolver(dados):
+    """Documento novo: resolve sentinelas em todos os níveis"""
+    return {
+        campo: _aplicar(None, valor)
+        for campo, valor in dados.items()
+        if valor is not transforms.DELETE_FIELD
+    }
+
+def _mesclar(destino, origem):
+    """set(merge=True): mapas aninhados são mesclados campo a campo"""
+    for campo, valor in origem.items():
+        if valor is transforms.DELETE_FIELD:
+            destino.pop(campo, None)
+        elif isinstance(valor, dict):
+            if not isinstance(destino.get(campo), dict):
+                destino[campo] = {}
+            _mesclar(destino[campo], valor)
+        else:
+            destino[campo] = _aplicar(destino.get(campo), valor)
+
+def _atualizar(documento, dados):
+    """update(): chaves com ponto ('impacto.chumbo') são caminhos"""
+    for caminho, valor in dados.items():
+        partes = caminho.split('.')
+        alvo = documento
+        for parte in partes[:-1]:
+            if not isinstance(alvo.get(parte), dict):
+                alvo[parte] = {}
+            alvo = alvo[parte]
+        if valor is transforms.DELETE_FIELD:
+            alvo.pop(partes[-1], None)
+        else:
+            alvo[partes[-1]] = _aplicar(alvo.get(partes[-1]), valor)
+
+_AUSENTE = object()
+
+def _valor_no_caminho(documento, caminho, padrao=None):
+    for parte in caminho.split('.'):
+        if not isinstance(documento, dict) or parte not in documento:
+            return padrao
+        documento = documento[parte]
+    return documento
+
+def _projetar(documento, campos):
+    """Só os campos pedidos ('__name__' = nenhum campo, só o id)"""
+    projetado = {}
+    for caminho in campos:
+        valor = _valor_no_caminho(documento, caminho, _AUSENTE)
+        if caminho == '__name__' or valor is _AUSENTE:
+            continue
+        partes = caminho.split('.')
+        alvo = projetado
+        for parte in partes[:-1]:
+            alvo = alvo.setdefault(parte, {})
+        alvo[partes[-1]] = valor
+    return projetado
+
+_OPERADORES = {
+    '==': lambda x, v: x == v,
+    '!=': lambda x, v: x is not None and x != v,
+    '<': lambda x, v: x is not None and x < v,
+    '<=': lambda x, v: x is not None and x <= v,
+    '>': lambda x, v: x is not None and x > v,
+    '>=': lambda x, v: x is not None and x >= v,
+    'in': lambda x, v: x in v,
+    'not-in': lambda x, v: x is not None and x not in v,
+    'array_contains': lambda x, v: isinstance(x, list) and v in x,
+    'array_contains_any': lambda x, v: isinstance(x, list) and any(i in x for i in v)
+}
+
+# ========================================
+# SNAPSHOTS E REFERÊNCIAS
+# ========================================
+
+class ResultadoEscrita:
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+class SnapshotMemoria:
+    def __init__(self, referencia, dados, update_time=None):
+        self.reference = referencia
+        self.id = referencia.id
+        self._dados = dados
+        self.exists = dados is not None
+        self.update_time = update_time
+    
+    def to_dict(self):
+        return copy.deepcopy(self._dados)
+    
+    def get(self, caminho):
+        return copy.deepcopy(_valor_no_caminho(self._dados, caminho))
+
+class DocumentoMemoria:
+    def __init__(self, cliente, colecao, doc_id):
+        self._cliente = cliente
+        self._colecao = colecao
+        self.id = str(doc_id)
+        self.path = f"{colecao}/{self.id}"
+    
+    def get(self, field_paths=None, transaction=None):
+        return self._cliente._ler(self, field_paths, transaction)
+    
+    def set(self, dados, merge=False):
+        return self._cliente._aplicar_escritas([('set', self, dados, merge)])[0]
+    
+    def create(self, dados):
+        return self._cliente._aplicar_escritas([('create', self, dados, False)])[0]
+    
+    def update(self, dados):
+        return self._cliente._aplicar_escritas([('update', self, dados, False)])[0]
+    
+    def delete(self):
+        return self._cliente._aplicar_escritas([('delete', self, None, False)])[0]
+    
+    def collection(self, nome):
+        return ColecaoMemoria(self._cliente, f"{self.path}/{nome}")
+
+# ========================================
+# CONSULTAS
+# ========================================
+
+class _ResultadoAgregacao:
+    def __init__(self, alias, value):
+        self.alias = alias
+        self.value = value
+
+class AgregacaoMemoria:
+    def __init__(self, consulta):
+        self._consulta = consulta
+        self._agregacoes = []
+    
+    def count(self, alias=None):
+        self._agregacoes.append(('count', None, alias or 'field_1'))
+        return self
+    
+    def sum(self, campo, alias=None):
+        self._agregacoes.append(('sum', campo, alias or 'field_1'))
+        return self
+    
+    def get(self, transaction=None):
+        documentos = [doc.to_dict() for doc in self._consulta.stream()]
+        resultados = []
+        for tipo, campo, alias in self._agregacoes:
+            if tipo == 'count':
+                valor = len(documentos)
+            else:
+                valor = sum(_valor_no_caminho(d, campo) or 0 for d in documentos)
+            resultados.append(_ResultadoAgregacao(alias, valor))
+        return [resultados]
+
+class ConsultaMemoria:
+    def __init__(self, cliente, colecao):
+        self._cliente = cliente
+        self._colecao = colecao
+        self._filtros = []
+        self._ordens = []
+        self._limite = None
+        self._campos = None
+    
+    def _copiar(self):
+        consulta = copy.copy(self)
+        consulta._filtros = list(self._filtros)
+        consulta._ordens = list(self._ordens)
+        return consulta
+    
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        consulta = self._copiar()
+        consulta._filtros.append((field_path, _OPERADORES[op_string], value))
+        return consulta
+    
+    def order_by(self, campo, direction='ASCENDING'):
+        consulta = self._copiar()
+        consulta._ordens.append((campo, direction == 'DESCENDING'))
+        return consulta
+    
+    def limit(self, quantidade):
+        consulta = self._copiar()
+        consulta._limite = quantidade
+        return consulta
+    
+    def select(self, campos):
+        consulta = self._copiar()
+        consulta._campos = list(campos)
+        return consulta
+    
+    def count(self, alias=None):
+        return AgregacaoMemoria(self).count(alias)
+    
+    def sum(self, campo, alias=None):
+        return AgregacaoMemoria(self).sum(campo, alias)
+    
+    def _casa(self, documento):
+        try:
+            return all(operador(_valor_no_caminho(documento, campo), valor)
+                       for campo, operador, valor in self._filtros)
+        except TypeError:
+            return False
+    
+    def stream(self, transaction=None):
+        with self._cliente._lock:
+            itens = [
+                (doc_id, copy.deepcopy(documento), versao)
+                for doc_id, (documento, versao) in self._cliente._dados.get(self._colecao, {}).items()
+                if self._casa(documento)
+            ]
+        
+        # Ordenação estável: da última chave para a primeira
+        for campo, decrescente in reversed(self._ordens):
+            itens = [item for item in itens if _valor_no_caminho(item[1], campo) is not None]
+            itens.sort(key=lambda item: _valor_no_caminho(item[1], campo), reverse=decrescente)
+        if self._limite is not None:
+            itens = itens[:self._limite]
+        
+        for doc_id, documento, versao in itens:
+            if self._campos is not None:
+                documento = _projetar(documento, self._campos)
+            referencia = DocumentoMemoria(self._cliente, self._colecao, doc_id)
+            yield SnapshotMemoria(referencia, documento, versao[1])
+    
+    def get(self, transaction=None):
+        return list(self.stream(transaction))
+    
+    def on_snapshot(self, callback):
+        return self._cliente._escutar(self, callback)
+
+class ColecaoMemoria(ConsultaMemoria):
+    _ids = itertools.count(1)
+    
+    def __init__(self, cliente, colecao):
+        super().__init__(cliente, colecao)
+        self.id = colecao.rsplit('/', 1)[-1]
+    
+    def document(self, doc_id=None):
+        if doc_id is None:
+            doc_id = f"auto{next(self._ids):012d}"
+        return DocumentoMemoria(self._cliente, self._colecao, doc_id)
+    
+    def add(self, dados):
+        referencia = self.document()
+        referencia.set(dados)
+        return datetime.now(), referencia
+
+# ========================================
+# ESCRITAS EM LOTE E TRANSAÇÕES
+# ========================================
+
+class LoteMemoria:
+    """WriteBatch: aplica todas as escritas juntas (tudo ou nada)"""
+    
+    def __init__(self, cliente):
+        self._cliente = cliente
+        self._escritas = []
+    
+    def set(self, referencia, dados, merge=False):
+        self._escritas.append(('set', referencia, dados, merge))
+        return self
+    
+    def create(self, referencia, dados):
+        self._escritas.append(('create', referencia, dados, False))
+        return self
+    
+    def update(self, referencia, dados):
+        self._escritas.append(('update', referencia, dados, False))
+        return self
+    
+    def delete(self, referencia):
+        self._escritas.append(('delete', referencia, None, False))
+        return self
+    
+    def commit(self):
+        if len(self._escritas) > LIMITE_BATCH:
+            raise ValueError(f"Máximo de {LIMITE_BATCH} escritas por lote")
+        escritas, self._escritas = self._escritas, []
+        return self._cliente._aplicar_escritas(escritas)
+    
+    def __len__(self):
+        return len(self._escritas)
+
+class TransacaoMemoria(LoteMemoria):
+    """
+    Transação otimista no protocolo de @firestore.transactional
+    (_clean_up, _begin, _commit, _rollback, _max_attempts)
+    """
+    
+    _ids = itertools.count(1)
+    
+    def __init__(self, cliente, max_attempts=5, read_only=False):
+        super().__init__(cliente)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._lidos = {}
+    
+    @property
+    def in_progress(self):
+        return self._id is not None
+    
+    @property
+    def id(self):
+        return self._id
+    
+    def _clean_up(self):
+        self._escritas = []
+        self._lidos = {}
+        self._id = None
+    
+    def _begin(self, retry_id=None):
+        self._id = next(self._ids)
+    
+    def _rollback(self):
+        self._clean_up()
+    
+    def _commit(self):
+        escritas, lidos = self._escritas, self._lidos
+        self._clean_up()
+        return self._cliente._aplicar_escritas(escritas, lidos)
+    
+    def _registrar_leitura(self, referencia, versao):
+        self._lidos.setdefault(referencia.path, versao)
+
+# ========================================
+# CLIENTE
+# ========================================
+
+class ClienteMemoria:
+    """
+    Substituto de firestore.client() em testes
+    
+    Uso:
+        db = ClienteMemoria()
+        db.collection('usuarios').document('1').set({'nome': 'Ana'})
+    """
+    
+    def __init__(self):
+        # {colecao: {doc_id: (dados, (numero da versão, update_time))}}
+        self._dados = {}
+        self._versoes = itertools.count(1)
+        self._lock = threading.RLock()
+        self._ouvintes = []
+    
+    def collection(self, nome):
+        return ColecaoMemoria(self, nome)
+    
+    def document(self, caminho):
+        colecao, doc_id = caminho.rsplit('/', 1)
+        return DocumentoMemoria(self, colecao, doc_id)
+    
+    def batch(self):
+        return LoteMemoria(self)
+    
+    def transaction(self, max_attempts=5, read_only=False):
+        return TransacaoMemoria(self, max_attempts, read_only)
+    
+    def get_all(self, referencias, field_paths=None, transaction=None):
+        return [referencia.get(field_paths=field_paths, transaction=transaction) for referencia in referencias]
+    
+    def _ler(self, referencia, campos, transacao):
+        with self._lock:
+            documento, versao = self._dados.get(referencia._colecao, {}).get(referencia.id, (None, (0, None)))
+            documento = copy.deepcopy(documento)
+            if transacao is not None:
+                transacao._registrar_leitura(referencia, versao[0])
+        if documento is not None and campos is not None:
+            documento = _projetar(documento, campos)
+        return SnapshotMemoria(referencia, documento, versao[1])
+    
+    def _aplicar_escritas(self, escritas, lidos=None):
+        """
+        Aplica as escritas atomicamente; lidos = versões vistas pela transação
+        
+        Returns:
+            list de ResultadoEscrita (update_time de cada escrita)
+        """
+        with self._lock:
+            if lidos:
+                for caminho, versao in lidos.items():
+                    colecao, doc_id = caminho.rsplit('/', 1)
+                    atual = self._dados.get(colecao, {}).get(doc_id, (None, (0, None)))[1][0]
+                    if atual != versao:
+                        raise Aborted(f"Documento {caminho} mudou durante a transação")
+            
+            # Confere tudo numa cópia antes de gravar (tudo ou nada)
+            novos = {}
+            for operacao, referencia, dados, merge in escritas:
+                chave = (referencia._colecao, referencia.id)
+                if chave in novos:
+                    documento = novos[chave]
+                else:
+                    documento = copy.deepcopy(self._dados.get(chave[0], {}).get(chave[1], (None,))[0])
+                
+                if operacao == 'create':
+                    if documento is not None:
+                        raise AlreadyExists(f"Documento já existe: {referencia.path}")
+                    documento = _resolver(dados)
+                elif operacao == 'set':
+                    if merge:
+                        documento = documento or {}
+                        _mesclar(documento, dados)
+                    else:
+                        documento = _resolver(dados)
+                elif operacao == 'update':
+                    if documento is None:
+                        raise NotFound(f"Documento não encontrado: {referencia.path}")
+                    _atualizar(documento, dados)
+                else:
+                    documento = None
+                novos[chave] = documento
+            
+            agora = datetime.now()
+            for (colecao, doc_id), documento in novos.items():
+                documentos = self._dados.setdefault(colecao, {})
+                if documento is None:
+                    documentos.pop(doc_id, None)
+                else:
+                    documentos[doc_id] = (documento, (next(self._versoes), agora))
+            
+            colecoes = {colecao for colecao, _ in novos}
+            ouvintes = [(consulta, callback) for consulta, callback in self._ouvintes
+                        if consulta._colecao in colecoes]
+        
+        # Fora do lock: o callback pode ler o banco
+        for consulta, callback in ouvintes:
+            callback(consulta.get(), [], agora)
+        
+        return [ResultadoEscrita(agora) for _ in escritas]
+    
+    def _escutar(self, consulta, callback):
+        with self._lock:
+            self._ouvintes.append((consulta, callback))
+        callback(consulta.get(), [], datetime.now())
+        return _Escuta(self, (consulta, callback))
+
+class _Escuta:
+    def __init__(self, cliente, ouvinte):
+        self._cliente = cliente
+        self._ouvinte = ouvinte
+    
+    def unsubscribe(self):
+        with self._cliente._lock:
+            if self._ouvinte in self._cliente._ouvintes:
+                self._cliente._ouvintes.remove(self._ouvinte)
@@ -5,173 +5,21 @@ Sistema que identifica materiais eletrônicos através de palavras-chave
 e fornece sugestões quando não consegue identificar com certeza
 """
 
-import re
+from collections import Counter
 
-# Base de dados de palavras-chave para cada material
-PALAVRAS_CHAVE_MATERIAIS = {
-    'Televisor': {
-        'keywords': ['tv', 'televisor', 'televisão', 'tela', 'monitor tv', 'smart tv', 'led', 'lcd', 'plasma'],
-        'categoria': 'Linha Marrom',
-        'confianca': 0
-    },
-    'Computador': {
-        'keywords': ['computador', 'pc', 'desktop', 'cpu', 'gabinete', 'torre', 'all in one'],
-        'categoria': 'Linha Marrom',
-        'confianca': 0
-    },
-    'Notebook': {
-        'keywords': ['notebook', 'laptop', 'note', 'chromebook', 'ultrabook', 'macbook'],
-        'categoria': 'Linha Marrom',
-        'confianca': 0
-    },
-    'Monitor': {
-        'keywords': ['monitor', 'tela computador', 'display', 'screen', 'crt', 'tela pc'],
-        'categoria': 'Linha Marrom',
-        'confianca': 0
-    },
-    'Celular': {
-        'keywords': ['celular', 'smartphone', 'telefone', 'iphone', 'android', 'mobile', 'samsung', 'motorola'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'Tablet': {
-        'keywords': ['tablet', 'ipad', 'galaxy tab', 'tab'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'Liquidificador': {
-        'keywords': ['liquidificador', 'mixer', 'blender', 'batedeira'],
-        'categoria': 'Linha Branca',
-        'confianca': 0
-    },
-    'Ferro de Passar': {
-        'keywords': ['ferro', 'ferro de passar', 'ferro roupa', 'passadeira', 'ferro eletrico'],
-        'categoria': 'Linha Branca',
-        'confianca': 0
-    },
-    'Ventilador': {
-        'keywords': ['ventilador', 'ventoinha', 'circulador', 'fan', 'ventilador de teto'],
-        'categoria': 'Linha Branca',
-        'confianca': 0
-    },
-    'Bateria': {
-        'keywords': ['bateria', 'pilha', 'pilhas', 'baterias', 'power bank', 'carregador portatil'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'Carregador': {
-        'keywords': ['carregador', 'fonte', 'adaptador', 'cabo usb', 'cabo carregador', 'fonte alimentacao'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'Fone de Ouvido': {
-        'keywords': ['fone', 'headphone', 'earphone', 'fone ouvido', 'auricular', 'headset'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'Teclado': {
-        'keywords': ['teclado', 'keyboard', 'teclas'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'Mouse': {
-        'keywords': ['mouse', 'rato', 'mouse pad'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'Impressora': {
-        'keywords': ['impressora', 'printer', 'multifuncional', 'scanner'],
-        'categoria': 'Linha Azul',
-        'confianca': 0
-    },
-    'Roteador': {
-        'keywords': ['roteador', 'modem', 'router', 'wifi', 'wi-fi', 'internet'],
-        'categoria': 'Linha Azul',
-        'confianca': 0
-    },
-    'Caixa de Som': {
-        'keywords': ['caixa som', 'speaker', 'alto falante', 'caixinha', 'bluetooth speaker'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'Webcam': {
-        'keywords': ['webcam', 'camera web', 'cam', 'camera'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'HD Externo': {
-        'keywords': ['hd', 'hd externo', 'disco rigido', 'hard disk', 'ssd', 'pen drive', 'pendrive'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'Controle Remoto': {
-        'keywords': ['controle', 'controle remoto', 'remote', 'controle tv'],
-        'categoria': 'Linha Verde',
-        'confianca': 0
-    },
-    'DVD/Blu-ray': {
-        'keywords': ['dvd', 'blu-ray', 'bluray', 'player', 'dvd player'],
-        'categoria': 'Linha Marrom',
-        'confianca': 0
-    },
-    'Video Game': {
-        'keywords': ['video game', 'videogame', 'console', 'playstation', 'xbox', 'nintendo', 'ps', 'joystick'],
-        'categoria': 'Linha Marrom',
-        'confianca': 0
-    },
-    'Micro-ondas': {
-        'keywords': ['microondas', 'micro-ondas', 'micro ondas', 'forno microondas'],
-        'categoria': 'Linha Branca',
-        'confianca': 0
-    },
-    'Geladeira': {
-        'keywords': ['geladeira', 'refrigerador', 'freezer', 'frigobar'],
-        'categoria': 'Linha Branca',
-        'confianca': 0
-    },
-    'Ar Condicionado': {
-        'keywords': ['ar condicionado', 'arcondicionado', 'ar-condicionado', 'ac', 'split'],
-        'categoria': 'Linha Branca',
-        'confianca': 0
-    }
-}
+from normalizacao_texto import normalizar_texto
+from registro_materiais import carregar_registro
 
-def normalizar_texto(texto):
-    """
-    Normaliza texto para comparação
-    Remove acentos, converte para minúsculas, remove caracteres especiais
-    """
-    if not texto:
-        return ""
-    
-    # Converter para minúsculas
-    texto = texto.lower().strip()
-    
-    # Remover acentos
-    replacements = {
-        'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a',
-        'é': 'e', 'ê': 'e',
-        'í': 'i',
-        'ó': 'o', 'ô': 'o', 'õ': 'o',
-        'ú': 'u', 'ü': 'u',
-        'ç': 'c'
-    }
-    
-    for old, new in replacements.items():
-        texto = texto.replace(old, new)
-    
-    # Remover caracteres especiais (manter apenas letras, números e espaços)
-    texto = re.sub(r'[^a-z0-9\s]', ' ', texto)
-    
-    # Remover espaços múltiplos
-    texto = re.sub(r'\s+', ' ', texto).strip()
-    
-    return texto
+# Palavras-chave de cada material (visão do registro único, materiais.json)
+PALAVRAS_CHAVE_MATERIAIS = carregar_registro().palavras_chave()
 
 def calcular_similaridade(descricao, keywords):
     """
     Calcula score de similaridade entre descrição e palavras-chave
     
+    Definição de referência do score, mantida como API pública:
+    MatcherMateriais dá o mesmo valor sem varrer todos os materiais
+    
     Returns:
         float entre 0 e 1 (0 = sem match, 1 = match perfeito)
     """
@@ -206,6 +54,134 @@ def calcular_similaridade(descricao, keywords):
     
     return score
 
+# ========================================
+# ÍNDICE PRÉ-COMPILADO DE PALAVRAS-CHAVE
+# ========================================
+
+class _AhoCorasick:
+    """
+    Autômato de Aho-Corasick: encontra, numa única passada pelo texto,
+    todas as palavras-chave que aparecem como substring
+    """
+    
+    def __init__(self, padroes):
+        self.transicoes = [{}]
+        self.falha = [0]
+        self.saidas = [[]]
+        
+        for padrao in padroes:
+            estado = 0
+            for char in padrao:
+                proximo = self.transicoes[estado].get(char)
+                if proximo is None:
+                    proximo = len(self.transicoes)
+                    self.transicoes[estado][char] = proximo
+                    self.transicoes.append({})
+                    self.falha.append(0)
+                    self.saidas.append([])
+                estado = proximo
+            self.saidas[estado].append(padrao)
+        
+        # Links de falha em largura (BFS)
+        fila = list(self.transicoes[0].values())
+        while fila:
+            estado = fila.pop(0)
+            for char, proximo in self.transicoes[estado].items():
+                fila.append(proximo)
+                f = self.falha[estado]
+                while f and char not in self.transicoes[f]:
+                    f = self.falha[f]
+                destino = self.transicoes[f].get(char, 0)
+                self.falha[proximo] = destino if destino != proximo else 0
+                self.saidas[proximo] = self.saidas[proximo] + self.saidas[self.falha[proximo]]
+    
+    def buscar(self, texto):
+        """Retorna o conjunto de padrões contidos no texto"""
+        encontrados = set()
+        estado = 0
+        for char in texto:
+            while estado and char not in self.transicoes[estado]:
+                estado = self.falha[estado]
+            estado = self.transicoes[estado].get(char, 0)
+            if self.saidas[estado]:
+                encontrados.update(self.saidas[estado])
+        return encontrados
+
+class MatcherMateriais:
+    """
+    Identificador pré-compilado: normaliza a base de palavras-chave uma vez
+    e pontua apenas os materiais candidatos
+    
+    Dá exatamente o mesmo score de calcular_similaridade() para cada
+    material; materiais sem nenhum match (score 0) não entram na lista
+    """
+    
+    def __init__(self, base):
+        self.materiais = list(base.keys())
+        self.categorias = [base[m]['categoria'] for m in self.materiais]
+        self.max_scores = [len(base[m]['keywords']) * 3 for m in self.materiais]
+        
+        self.exatos = {}      # keyword normalizada -> materiais
+        self.substrings = {}  # keyword normalizada -> {material: ocorrências}
+        self.tokens = {}      # token -> {material: nº de keywords com o token}
+        
+        for indice, material in enumerate(self.materiais):
+            for keyword in base[material]['keywords']:
+                keyword_norm = normalizar_texto(keyword)
+                
+                self.exatos.setdefault(keyword_norm, set()).add(indice)
+                
+                ocorrencias = self.substrings.setdefault(keyword_norm, {})
+                ocorrencias[indice] = ocorrencias.get(indice, 0) + 1
+                
+                for token in set(keyword_norm.split()):
+                    por_material = self.tokens.setdefault(token, {})
+                    por_material[indice] = por_material.get(indice, 0) + 1
+        
+        self.automato = _AhoCorasick(self.substrings.keys())
+    
+    def pontuar(self, descricao):
+        """
+        Returns:
+            list de dicts {material, score, categoria} com score > 0,
+            ordenada como em identificar_material (score desc, ordem da base)
+        """
+        descricao_norm = normalizar_texto(descricao)
+        if not descricao_norm:
+            return []
+        
+        matches = {}
+        
+        # Match parcial (keyword contida na descrição) - peso 2
+        for keyword_norm in self.automato.buscar(descricao_norm):
+            for indice, n in self.substrings[keyword_norm].items():
+                matches[indice] = matches.get(indice, 0) + 2 * n
+        
+        # Match de palavras individuais
+        for palavra in set(descricao_norm.split()):
+            for indice, n in self.tokens.get(palavra, {}).items():
+                matches[indice] = matches.get(indice, 0) + n
+        
+        exatos = self.exatos.get(descricao_norm, ())
+        
+        scores = []
+        for indice, total in matches.items():
+            if indice in exatos:
+                score = 1.0
+            else:
+                max_score = self.max_scores[indice]
+                score = min(total / max_score, 1.0) if max_score > 0 else 0.0
+            scores.append((indice, score))
+        
+        scores.sort(key=lambda x: (-x[1], x[0]))
+        
+        return [
+            {'material': self.materiais[i], 'score': score, 'categoria': self.categorias[i]}
+            for i, score in scores
+        ]
+
+_MATCHER = MatcherMateriais(PALAVRAS_CHAVE_MATERIAIS)
+
 def identificar_material(descricao_usuario):
     """
     Identifica material baseado na descrição do usuário
@@ -230,19 +206,19 @@ def identificar_material(descricao_usuario):
             'sugestoes': []
         }
     
-    # Calcular similaridade com cada material
-    scores = []
-    
-    for material, data in PALAVRAS_CHAVE_MATERIAIS.items():
-        score = calcular_similaridade(descricao_usuario, data['keywords'])
-        scores.append({
-            'material': material,
-            'score': score,
-            'categoria': data['categoria']
-        })
-    
-    # Ordenar por score (maior para menor)
-    scores.sort(key=lambda x: x['score'], reverse=True)
+    # Calcular similaridade só com os materiais candidatos
+    return _decidir(_MATCHER.pontuar(descricao_usuario))
+
+def _decidir(scores):
+    """Aplica os thresholds de confiança sobre os scores ordenados"""
+    if not scores:
+        return {
+            'identificado': False,
+            'material': None,
+            'confianca': 0.0,
+            'categoria': None,
+            'sugestoes': []
+        }
     
     melhor_match = scores[0]
     
@@ -288,6 +264,179 @@ def identificar_material(descricao_usuario):
             'sugestoes': sugestoes
         }
 
+# ========================================
+# BUSCA TOLERANTE A ERROS DE DIGITAÇÃO
+# ========================================
+
+def distancia_edicao(a, b, limite=None):
+    """
+    Distância de Levenshtein entre a e b
+    Com limite, para cedo e retorna limite + 1 se já passou dele
+    """
+    if a == b:
+        return 0
+    if limite is not None and abs(len(a) - len(b)) > limite:
+        return limite + 1
+    
+    anterior = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        atual = [i]
+        for j, char_b in enumerate(b, 1):
+            atual.append(min(
+                anterior[j] + 1,
+                atual[j - 1] + 1,
+                anterior[j - 1] + (char_a != char_b)
+            ))
+        if limite is not None and min(atual) > limite:
+            return limite + 1
+        anterior = atual
+    
+    return anterior[-1]
+
+def _trigramas(palavra):
+    """
+    Trigramas com bordas marcadas ('^^t', '^te', ..., 'o$$'), com
+    multiplicidade (Counter): o limite de trigramas comuns vale para
+    multiconjuntos, e palavras como 'aaaa' repetem trigramas
+    """
+    marcada = f"^^{palavra}$$"
+    return Counter(marcada[i:i + 3] for i in range(len(marcada) - 2))
+
+class IndiceTrigramas:
+    """
+    Índice de trigramas para busca por distância de edição
+    
+    Uma palavra a no máximo k edições compartilha pelo menos
+    max(len) + 2 - 3k trigramas com a consulta (contando repetições);
+    só essas candidatas passam pelo cálculo (com corte) da distância
+    de edição. Quando esse mínimo é <= 0 (palavras curtas), as palavras
+    curtas sem nenhum trigrama em comum também são candidatas
+    """
+    
+    def __init__(self, palavras=()):
+        self.palavras = []
+        self.postings = {}
+        self.por_tamanho = {}
+        for palavra in palavras:
+            self.adicionar(palavra)
+    
+    def adicionar(self, palavra):
+        indice = len(self.palavras)
+        self.palavras.append(palavra)
+        self.por_tamanho.setdefault(len(palavra), []).append(indice)
+        for trigrama, n in _trigramas(palavra).items():
+            self.postings.setdefault(trigrama, []).append((indice, n))
+    
+    def buscar(self, palavra, limite):
+        """
+        Returns:
+            list de (distancia, palavra) com distancia <= limite, ordenada
+        """
+        comuns = {}
+        for trigrama, n_consulta in _trigramas(palavra).items():
+            for indice, n in self.postings.get(trigrama, ()):
+                comuns[indice] = comuns.get(indice, 0) + min(n, n_consulta)
+        
+        # Mínimo <= 0: qualquer palavra curta o bastante pode estar no limite
+        maior_sem_minimo = 3 * limite - 2
+        if len(palavra) <= maior_sem_minimo:
+            for tamanho in range(max(0, len(palavra) - limite), maior_sem_minimo + 1):
+                for indice in self.por_tamanho.get(tamanho, ()):
+                    comuns.setdefault(indice, 0)
+        
+        resultados = []
+        for indice, n in comuns.items():
+            candidata = self.palavras[indice]
+            if abs(len(candidata) - len(palavra)) > limite:
+                continue
+            if n < max(len(candidata), len(palavra)) + 2 - 3 * limite:
+                continue
+            distancia = distancia_edicao(palavra, candidata, limite)
+            if distancia <= limite:
+                resultados.append((distancia, candidata))
+        
+        return sorted(resultados)
+    
+    def __len__(self):
+        return len(self.palavras)
+
+# Tamanho mínimo da palavra para tentar correção (evita 'tv' -> 'pc')
+TAMANHO_MINIMO_FUZZY = 4
+
+# Penalidade no score quando a descrição precisou de correção
+PENALIDADE_CORRECAO = 0.9
+
+def _limite_edicoes(palavra):
+    """1 edição para palavras curtas, 2 a partir de 7 letras"""
+    return 1 if len(palavra) < 7 else 2
+
+class MatcherFuzzy:
+    """
+    Corrige palavras com erro de digitação ("televizao", "celuar")
+    para o token de palavra-chave mais próximo e pontua com o
+    MatcherMateriais normal
+    """
+    
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.vocabulario = set(matcher.tokens)
+        self.indice = IndiceTrigramas(sorted(
+            t for t in self.vocabulario if len(t) >= TAMANHO_MINIMO_FUZZY
+        ))
+    
+    def corrigir(self, descricao):
+        """
+        Returns:
+            (descricao_corrigida, houve_correcao)
+        """
+        palavras = normalizar_texto(descricao).split()
+        corrigida = []
+        houve_correcao = False
+        
+        for palavra in palavras:
+            if palavra in self.vocabulario or len(palavra) < TAMANHO_MINIMO_FUZZY:
+                corrigida.append(palavra)
+                continue
+            
+            candidatos = self.indice.buscar(palavra, _limite_edicoes(palavra))
+            if candidatos:
+                corrigida.append(candidatos[0][1])
+                houve_correcao = True
+            else:
+                corrigida.append(palavra)
+        
+        return ' '.join(corrigida), houve_correcao
+    
+    def pontuar(self, descricao):
+        corrigida, houve_correcao = self.corrigir(descricao)
+        scores = self.matcher.pontuar(corrigida)
+        
+        if houve_correcao:
+            for s in scores:
+                s['score'] *= PENALIDADE_CORRECAO
+        
+        return scores
+
+_MATCHER_FUZZY = MatcherFuzzy(_MATCHER)
+
+def identificar_material_fuzzy(descricao_usuario):
+    """
+    Igual a identificar_material(), mas tolera erros de digitação
+    Se a descrição exata já identifica o material, nada é corrigido
+    
+    Returns:
+        dict no mesmo formato de identificar_material()
+    """
+    resultado = identificar_material(descricao_usuario)
+    if resultado['identificado'] or not descricao_usuario or not descricao_usuario.strip():
+        return resultado
+    
+    resultado_fuzzy = _decidir(_MATCHER_FUZZY.pontuar(descricao_usuario))
+    
+    if resultado_fuzzy['identificado'] or resultado_fuzzy['confianca'] > resultado['confianca']:
+        return resultado_fuzzy
+    return resultado
+
 def formatar_resultado_identificacao(resultado):
     """
     Formata resultado da identificação para exibição
@@ -398,5 +547,87 @@ def testar_identificador():
             print(f"Sugestões: {[s['material'] for s in resultado['sugestoes']]}")
         print("-" * 60)
 
+def benchmark_identificador(repeticoes=2000):
+    """Compara o índice pré-compilado com a varredura linear original"""
+    import time
+    
+    def pontuar_linear(descricao_usuario):
+        """Pontuação original: calcular_similaridade() para cada material"""
+        scores = [
+            {'material': material,
+             'score': calcular_similaridade(descricao_usuario, data['keywords']),
+             'categoria': data['categoria']}
+            for material, data in PALAVRAS_CHAVE_MATERIAIS.items()
+        ]
+        scores.sort(key=lambda x: x['score'], reverse=True)
+        return scores
+    
+    testes = [
+        "um celular velho",
+        "televisão quebrada",
+        "notebook dell",
+        "carregador de telefone",
+        "uma coisa que liga no computador",
+        "negocio de passar roupa",
+        "caixa de som bluetooth",
+        "troço que toca musica",
+        "aparelho de fazer vento"
+    ]
+    
+    print("🧪 BENCHMARK DO IDENTIFICADOR\n")
+    
+    identicos = all(
+        identificar_material(t) == _decidir(pontuar_linear(t))
+        for t in testes
+    )
+    
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for t in testes:
+            _decidir(pontuar_linear(t))
+    linear = repeticoes * len(testes) / (time.perf_counter() - inicio)
+    
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for t in testes:
+            identificar_material(t)
+    indexado = repeticoes * len(testes) / (time.perf_counter() - inicio)
+    
+    print(f"Linear:  {linear:,.0f} identificações/s")
+    print(f"Índice:  {indexado:,.0f} identificações/s ({indexado / linear:.1f}x)")
+    print(f"Resultados idênticos: {identicos}")
+
+def benchmark_fuzzy(tamanho_base=5000, consultas=2000):
+    """Mede a busca no índice de trigramas com uma base sintética de palavras-chave"""
+    import random
+    import time
+    
+    print("🧪 BENCHMARK DA BUSCA FUZZY\n")
+    
+    for teste in ["televizao", "celuar", "notebok", "ventiladr", "carregadro"]:
+        resultado = identificar_material_fuzzy(teste)
+        print(f"'{teste}' -> {resultado['material'] or [s['material'] for s in resultado['sugestoes']]}")
+    
+    rng = random.Random(1)
+    letras = 'abcdefghijklmnopqrstuvwxyz'
+    base = {''.join(rng.choices(letras, k=rng.randint(5, 12))) for _ in range(tamanho_base)}
+    indice = IndiceTrigramas(sorted(base))
+    
+    palavras = sorted(base)
+    alvos = []
+    for _ in range(consultas):
+        p = list(rng.choice(palavras))
+        p[rng.randrange(len(p))] = rng.choice(letras)
+        alvos.append(''.join(p))
+    
+    inicio = time.perf_counter()
+    for alvo in alvos:
+        indice.buscar(alvo, _limite_edicoes(alvo))
+    por_consulta = (time.perf_counter() - inicio) / consultas * 1000
+    
+    print(f"\nBase: {len(indice):,} palavras | {por_consulta:.3f} ms por consulta")
+
 if __name__ == "__main__":
     testar_identificador()
+    benchmark_identificador()
+    benchmark_fuzzy()
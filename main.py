@@ -7,9 +7,11 @@
 # ✅ Aba de Aprendizagem com fontes científicas
 
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import random
 import json
+import secrets
 import re
 import bcrypt
 import firebase_admin
@@ -17,13 +19,21 @@ from firebase_admin import credentials, firestore
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from registro_materiais import carregar_registro
+from config_servico import obter_servico_config
+from projecoes import CAMPOS_USUARIO, projetar
+from registros import Descarte, Resgate, Usuario
+from contadores_impacto import aprovar_descarte_com_impacto, impacto_do_aluno, impacto_da_escola
+from database_impacto import renderizar_card_impacto
+from identificador_materiais import PALAVRAS_CHAVE_MATERIAIS
+from modelo_identificador import carregar_modelo, identificar_material_aprendido, treinar_e_salvar
 
 # ========================================
 # IMPORTAR EXPORT DE DADOS
 # ========================================
 
 try:
-    from export_dados import registrar_evento, mostrar_painel_export
+    from export_dados import montar_evento, registrar_evento, mostrar_painel_export
     EXPORT_DISPONIVEL = True
 except ImportError:
     EXPORT_DISPONIVEL = False
@@ -365,39 +375,51 @@ def registrar_big_data_anonimo(db, material, quantidade, categoria):
 # BANCO DE DADOS
 # ========================================
 
-def buscar_usuario_por_id(user_id):
+def buscar_usuario_por_id(user_id, campos=CAMPOS_USUARIO['sessao']):
     if not db:
         return None
     user_ref = db.collection('usuarios').document(str(user_id))
-    user_doc = user_ref.get()
+    # Projeção: senha e código de recuperação não saem do servidor
+    user_doc = user_ref.get(field_paths=list(campos))
     
     if user_doc.exists:
         data = user_doc.to_dict()
         if 'dataCadastro' in data and hasattr(data['dataCadastro'], 'strftime'):
             data['dataCadastro'] = data['dataCadastro'].strftime('%d/%m/%Y %H:%M')
-        if 'categoriasCompradas' not in data:
+        # Padrão só quando o campo foi pedido (fora da projeção = desconhecido)
+        if 'categoriasCompradas' in campos and 'categoriasCompradas' not in data:
             data['categoriasCompradas'] = {'1': [], '2': [], '3': []}
-        if 'senha' in data:
-            del data['senha']
         return data
     return None
 
-def load_usuarios():
+def load_usuarios(tela='admin'):
+    """tela: conjunto de campos de CAMPOS_USUARIO ('sessao' ou 'admin')"""
     if not db:
         return []
     usuarios = []
-    docs = db.collection('usuarios').stream()
+    # A projeção 'admin' não traz categoriasCompradas: sem o campo, o
+    # registro não finge um histórico de compras vazio
+    com_categorias = 'categoriasCompradas' in CAMPOS_USUARIO[tela]
+    docs = projetar(db.collection('usuarios'), tela).stream()
     for doc in docs:
-        data = doc.to_dict()
-        if 'dataCadastro' in data and hasattr(data['dataCadastro'], 'strftime'):
-            data['dataCadastro'] = data['dataCadastro'].strftime('%d/%m/%Y %H:%M')
-        if 'categoriasCompradas' not in data:
+        # dataCadastro só é formatada quando lida
+        data = Usuario.do_documento(doc)
+        if com_categorias and 'categoriasCompradas' not in data:
             data['categoriasCompradas'] = {'1': [], '2': [], '3': []}
-        if 'senha' in data:
-            del data['senha']
         usuarios.append(data)
     return usuarios
 
+def contar_usuarios():
+    return contar_documentos('usuarios')
+
+def contar_documentos(colecao):
+    """Agregação count() no servidor (não baixa os documentos)"""
+    if not db:
+        return 0
+    for resultado in db.collection(colecao).count().get():
+        return int(resultado[0].value)
+    return 0
+
 def atualizar_pontos(user_id, pontos_adicionar):
     if not db:
         return
@@ -428,19 +450,18 @@ def adicionar_categoria_comprada(user_id, categoria, trimestre):
 def get_trimestre_atual():
     if not db:
         return 1
-    config_ref = db.collection('config').document('sistema')
-    config_doc = config_ref.get()
-    if config_doc.exists:
-        return config_doc.to_dict().get('trimestreAtual', 1)
+    config = obter_servico_config(db)
+    sistema = config.obter('sistema')
+    if sistema is not None:
+        return sistema.get('trimestreAtual', 1)
     else:
-        config_ref.set({'trimestreAtual': 1})
+        config.definir('sistema', {'trimestreAtual': 1})
         return 1
 
 def set_trimestre_atual(trimestre):
     if not db:
         return
-    config_ref = db.collection('config').document('sistema')
-    config_ref.set({'trimestreAtual': trimestre})
+    obter_servico_config(db).definir('sistema', {'trimestreAtual': trimestre})
 
 def salvar_snapshot_trimestre(trimestre, usuarios, descartes):
     if not db:
@@ -469,8 +490,8 @@ def salvar_snapshot_trimestre(trimestre, usuarios, descartes):
 def resetar_pontuacao_usuarios():
     if not db:
         return
-    usuarios_ref = db.collection('usuarios')
-    docs = usuarios_ref.stream()
+    # Só o id do documento (select([]) vazio devolveria todos os campos)
+    docs = db.collection('usuarios').select(['__name__']).stream()
     for doc in docs:
         doc.reference.update({'pontos': 0.0})
 
@@ -488,6 +509,7 @@ def criar_descarte(usuario_id, numero, linha, material, quantidade, pontos, cust
         'pontos': pontos,
         'status': 'Pendente',
         'customizado': customizado,
+        'trimestre': get_trimestre_atual(),
         'data': datetime.now()
     }
     db.collection('descartes').document(str(descarte_id)).set(dados)
@@ -508,10 +530,8 @@ def load_descartes():
     descartes = []
     docs = db.collection('descartes').stream()
     for doc in docs:
-        data = doc.to_dict()
-        if 'data' in data and hasattr(data['data'], 'strftime'):
-            data['data'] = data['data'].strftime('%d/%m/%Y %H:%M')
-        descartes.append(data)
+        # data fica como datetime e só é formatada quando lida
+        descartes.append(Descarte.do_documento(doc))
     return descartes
 
 def atualizar_status_descarte(descarte_id, status):
@@ -519,6 +539,25 @@ def atualizar_status_descarte(descarte_id, status):
         return
     db.collection('descartes').document(str(descarte_id)).update({'status': status})
 
+def aprovar_descarte(descarte_id, material_corrigido=None):
+    """
+    material_corrigido: material do catálogo escolhido pelo admin para um
+    descarte customizado; gravado na mesma transação da aprovação, então
+    conta no impacto e vira exemplo de treino do identificador
+    """
+    if not db:
+        return False, "❌ Sem conexão"
+    return aprovar_descarte_com_impacto(db, descarte_id, material_corrigido)
+
+def sugerir_material(descricao):
+    """Material provável de um texto livre (sem modelo salvo, usa a heurística)"""
+    return identificar_material_aprendido(descricao, carregar_modelo(db))
+
+def retreinar_identificador():
+    if not db:
+        return None
+    return treinar_e_salvar(db)
+
 def criar_resgate(usuario_id, categoria, cupom, codigo, pontos):
     if not db:
         return
@@ -535,16 +574,72 @@ def criar_resgate(usuario_id, categoria, cupom, codigo, pontos):
     }
     db.collection('resgates').document(str(resgate_id)).set(dados)
 
+@firestore.transactional
+def _comprar_cupom_transacao(transaction, user_id, categoria, cupom, trimestre):
+    user_ref = db.collection('usuarios').document(str(user_id))
+    user_doc = user_ref.get(transaction=transaction)
+    if not user_doc.exists:
+        return False, "Usuário não encontrado"
+    
+    user_data = user_doc.to_dict()
+    if user_data.get('pontos', 0) < cupom['pontos']:
+        return False, "Insuficientes!"
+    
+    agora = datetime.now()
+    # Sufixo aleatório: duas compras no mesmo milissegundo não colidem no create()
+    resgate_id = f"{int(agora.timestamp() * 1000)}-{secrets.token_hex(4)}"
+    codigo = f"CUP-{random.randint(1000, 9999)}"
+    
+    atualizacao = {'pontos': firestore.Increment(-cupom['pontos'])}
+    if isinstance(user_data.get('categoriasCompradas'), dict):
+        atualizacao[f'categoriasCompradas.{trimestre}'] = firestore.ArrayUnion([categoria])
+    else:
+        atualizacao['categoriasCompradas'] = {'1': [], '2': [], '3': [], str(trimestre): [categoria]}
+    transaction.update(user_ref, atualizacao)
+    
+    transaction.create(db.collection('resgates').document(resgate_id), {
+        'id': resgate_id,
+        'usuarioId': user_id,
+        'categoria': categoria,
+        'cupom': cupom['nome'],
+        'codigo': codigo,
+        'pontos': cupom['pontos'],
+        'status': 'Pendente',
+        'data': agora
+    })
+    
+    if EXPORT_DISPONIVEL:
+        evento = montar_evento('cupom_resgatado', user_id, {
+            'resgate_id': resgate_id,
+            'categoria': categoria,
+            'cupom': cupom['nome'],
+            'codigo': codigo,
+            'pontos': cupom['pontos']
+        }, agora)
+        transaction.create(db.collection('log_eventos').document(evento['id']), evento)
+    
+    return True, codigo
+
+def comprar_cupom(user_id, categoria, cupom):
+    """
+    Débito dos pontos, resgate, categoria comprada no trimestre e evento
+    de auditoria numa única transação (tudo ou nada)
+    
+    Returns:
+        (sucesso, codigo ou mensagem de erro)
+    """
+    if not db:
+        return False, "Sem conexão"
+    return _comprar_cupom_transacao(db.transaction(), user_id, categoria, cupom, get_trimestre_atual())
+
 def load_resgates():
     if not db:
         return []
     resgates = []
     docs = db.collection('resgates').stream()
     for doc in docs:
-        data = doc.to_dict()
-        if 'data' in data and hasattr(data['data'], 'strftime'):
-            data['data'] = data['data'].strftime('%d/%m/%Y %H:%M')
-        resgates.append(data)
+        # data fica como datetime e só é formatada quando lida
+        resgates.append(Resgate.do_documento(doc))
     return resgates
 
 def atualizar_status_resgate(resgate_id, status):
@@ -552,6 +647,63 @@ def atualizar_status_resgate(resgate_id, status):
         return
     db.collection('resgates').document(str(resgate_id)).update({'status': status})
 
+def carregar_dados_admin():
+    """
+    Usuários, descartes, resgates e trimestre carregados em paralelo
+    
+    As quatro leituras são independentes; cada uma roda numa thread do
+    pool (o client do Firestore é thread-safe), então o tempo da tela
+    admin é o da leitura mais lenta, não a soma das quatro
+    
+    Returns:
+        (usuarios, descartes, resgates, trimestre_atual)
+    """
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        usuarios = pool.submit(load_usuarios)
+        descartes = pool.submit(load_descartes)
+        resgates = pool.submit(load_resgates)
+        trimestre = pool.submit(get_trimestre_atual)
+        return usuarios.result(), descartes.result(), resgates.result(), trimestre.result()
+
+LIMITE_PENDENTES_ADMIN = 10
+
+def load_pendentes(colecao, limite=LIMITE_PENDENTES_ADMIN):
+    """Só os primeiros pendentes de 'descartes' ou 'resgates' (fragmento de moderação do admin)"""
+    if not db:
+        return []
+    registro = Descarte if colecao == 'descartes' else Resgate
+    docs = db.collection(colecao).where('status', '==', 'Pendente').limit(limite).stream()
+    return [registro.do_documento(doc) for doc in docs]
+
+TAMANHO_PAGINA_HISTORICO = 20
+
+def _load_pagina_usuario(colecao, usuario_id, cursor=None, tamanho=TAMANHO_PAGINA_HISTORICO):
+    """
+    Uma página dos documentos do usuário, mais recentes primeiro
+    (índice composto usuarioId + data desc em firestore.indexes.json)
+    
+    Returns:
+        (itens, proximo_cursor) - proximo_cursor é None na última página
+    """
+    if not db:
+        return [], None
+    query = (db.collection(colecao)
+             .where('usuarioId', '==', usuario_id)
+             .order_by('data', direction=firestore.Query.DESCENDING))
+    if cursor is not None:
+        query = query.start_after(cursor)
+    docs = list(query.limit(tamanho + 1).stream())
+    proximo = docs[tamanho - 1] if len(docs) > tamanho else None
+    registro = Descarte if colecao == 'descartes' else Resgate
+    itens = [registro.do_documento(doc) for doc in docs[:tamanho]]
+    return itens, proximo
+
+def load_resgates_usuario(usuario_id, cursor=None):
+    return _load_pagina_usuario('resgates', usuario_id, cursor)
+
+def load_descartes_usuario(usuario_id, cursor=None):
+    return _load_pagina_usuario('descartes', usuario_id, cursor)
+
 # ========================================
 # CONFIG STREAMLIT
 # ========================================
@@ -588,11 +740,8 @@ TURMAS = ['601', '602', '603', '604', '605', '606', '607',
           '801', '802', '803', '804', '805', '806', '807', '808',
           '901', '902', '903', '904', '905', '906']
 
-MATERIAIS = {
-    'Linha Marrom': {'Televisor': 5, 'Computador': 4, 'Notebook': 3.5, 'Monitor': 3},
-    'Linha Azul': {'Liquidificador': 1.5, 'Ferro de Passar': 1, 'Ventilador': 2},
-    'Linha Verde': {'Celular': 2.5, 'Bateria': 1.5, 'Carregador': 1, 'Fone de Ouvido': 0.5}
-}
+# Pontos por material, agrupados por linha (visão do registro único, materiais.json)
+MATERIAIS = carregar_registro().pontos_por_categoria()
 
 CATEGORIAS = {
     'Matemática': [{'nome': 'Cupom Matemática', 'pontos': 45}],
@@ -627,8 +776,7 @@ def home_screen():
     </div>""", unsafe_allow_html=True)
     
     try:
-        usuarios = load_usuarios()
-        st.success(f"✅ Firestore OK! 👥 {len(usuarios)} alunos")
+        st.success(f"✅ Firestore OK! 👥 {contar_usuarios()} alunos")
     except:
         st.warning("⚠️ Carregando...")
     
@@ -788,7 +936,7 @@ def dashboard_screen():
     st.markdown("<h1 style='color: #22c55e;'>♻️ Dashboard</h1>", unsafe_allow_html=True)
     st.session_state.user = buscar_usuario_por_id(st.session_state.user['id'])
     
-    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    col1, col2, col3, col4, col5, col6, col7 = st.columns(7)
     with col1:
         if st.button("📱 Cadastrar", use_container_width=True):
             st.session_state.screen = 'cadastrar_eletro'
@@ -802,14 +950,18 @@ def dashboard_screen():
             st.session_state.screen = 'resgates'
             st.rerun()
     with col4:
+        if st.button("📜 Histórico", use_container_width=True):
+            st.session_state.screen = 'historico'
+            st.rerun()
+    with col5:
         if st.button("📚 Aprender", use_container_width=True):
             st.session_state.screen = 'aprendizagem'
             st.rerun()
-    with col5:
+    with col6:
         if st.button("⚙️ Config", use_container_width=True):
             st.session_state.screen = 'configuracoes'
             st.rerun()
-    with col6:
+    with col7:
         if st.button("🚪 Sair", use_container_width=True):
             st.session_state.user = None
             st.session_state.screen = 'home'
@@ -817,6 +969,13 @@ def dashboard_screen():
     
     st.markdown(f"## 👋 {st.session_state.user['nome']}")
     st.markdown(f"<div class='stat-card'><p>Pontos</p><h1>{st.session_state.user['pontos']:.1f}</h1></div>", unsafe_allow_html=True)
+    
+    impacto = impacto_do_aluno(st.session_state.user)
+    if impacto['quantidade']:
+        st.markdown(f"""<div class='card-ok'>
+            🌍 Você já reciclou <b>{impacto['quantidade']}</b> aparelhos: <b>{impacto['chumbo']:.3f} kg</b> de chumbo fora do solo
+            e <b>{impacto['co2_evitado_kg']:.1f} kg</b> de CO₂ evitado
+        </div>""", unsafe_allow_html=True)
 
 def configuracoes_screen():
     st.markdown("<h1 style='color: #22c55e;'>⚙️ Configurações</h1>", unsafe_allow_html=True)
@@ -999,29 +1158,40 @@ def cupons_screen():
                     if st.session_state.user['pontos'] < cupom['pontos']:
                         st.error("❌ Insuficientes!")
                     else:
-                        atualizar_pontos(st.session_state.user['id'], -cupom['pontos'])
-                        codigo = f"CUP-{random.randint(1000, 9999)}"
-                        criar_resgate(st.session_state.user['id'], cat_nome, cupom['nome'], codigo, cupom['pontos'])
-                        
-                        if EXPORT_DISPONIVEL:
-                            registrar_evento(db, 'cupom_resgatado', st.session_state.user['id'], {
-                                'categoria': cat_nome,
-                                'cupom': cupom['nome'],
-                                'codigo': codigo,
-                                'pontos': cupom['pontos']
-                            })
+                        sucesso, resultado = comprar_cupom(st.session_state.user['id'], cat_nome, cupom)
                         
-                        st.success(f"✅ {codigo}!")
-                        st.rerun()
+                        if sucesso:
+                            st.success(f"✅ {resultado}!")
+                            st.rerun()
+                        else:
+                            st.error(f"❌ {resultado}")
     
     st.markdown("---")
     if st.button("🏠 Voltar ao Dashboard", use_container_width=True):
         st.session_state.screen = 'dashboard'
         st.rerun()
 
+def _paginar_historico(chave, carregar):
+    """Mostra uma página por vez, guardando os cursores na sessão"""
+    cursores = st.session_state.setdefault(chave, [None])
+    itens, proximo = carregar(cursores[-1])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if len(cursores) > 1 and st.button("⬅️ Mais recentes", use_container_width=True):
+            cursores.pop()
+            st.rerun()
+    with col2:
+        if proximo is not None and st.button("Mais antigos ➡️", use_container_width=True):
+            cursores.append(proximo)
+            st.rerun()
+    
+    return itens
+
 def resgates_screen():
     st.markdown("<h1 style='color: #22c55e;'>🎫 Meus Cupons</h1>", unsafe_allow_html=True)
-    resgates = [r for r in load_resgates() if r['usuarioId'] == st.session_state.user['id']]
+    user_id = st.session_state.user['id']
+    resgates = _paginar_historico('cursores_resgates', lambda cursor: load_resgates_usuario(user_id, cursor))
     
     if resgates:
         for r in resgates:
@@ -1030,6 +1200,28 @@ def resgates_screen():
         st.info("Nenhum")
     
     if st.button("Voltar", use_container_width=True):
+        st.session_state.pop('cursores_resgates', None)
+        st.session_state.screen = 'dashboard'
+        st.rerun()
+
+def historico_screen():
+    st.markdown("<h1 style='color: #22c55e;'>📜 Meu Histórico</h1>", unsafe_allow_html=True)
+    user_id = st.session_state.user['id']
+    descartes = _paginar_historico('cursores_historico', lambda cursor: load_descartes_usuario(user_id, cursor))
+    
+    if descartes:
+        icones = {'Aprovado': '✅', 'Pendente': '⏳', 'Recusado': '❌'}
+        for d in descartes:
+            classe = 'card-ok' if d['status'] == 'Aprovado' else 'card-wait'
+            st.markdown(f"""<div class='{classe}'>
+                {icones.get(d['status'], '')} <b>{d['numero']}</b> | {d['data']}<br>
+                {d['material']} ({d['quantidade']} un) = {d['pontos']} pts | {d['status']}
+            </div>""", unsafe_allow_html=True)
+    else:
+        st.info("Nenhum descarte ainda")
+    
+    if st.button("Voltar", use_container_width=True):
+        st.session_state.pop('cursores_historico', None)
         st.session_state.screen = 'dashboard'
         st.rerun()
 
@@ -1044,6 +1236,10 @@ def cadastrar_eletro_screen():
         
         if material_opcao == '📝 Outro Material':
             material = st.text_input("📝 Digite o material customizado:")
+            if material:
+                sugestao = sugerir_material(material)
+                if sugestao['identificado']:
+                    st.info(f"🤖 Parece ser: {sugestao['material']} ({sugestao['categoria']})")
             pts = st.number_input("Pontos (estimado):", min_value=0.5, max_value=5.0, value=2.0, step=0.5)
             qtd = st.number_input("Qtd", min_value=1, value=1)
             pontos_total = pts * qtd
@@ -1052,6 +1248,10 @@ def cadastrar_eletro_screen():
             pts = materiais[material]
             qtd = st.number_input("Qtd", min_value=1, value=1)
             pontos_total = pts * qtd
+            # Card memoizado por (material, quantidade); vazio sem dados de impacto
+            card_impacto = renderizar_card_impacto(material, qtd)
+            if card_impacto:
+                st.markdown(card_impacto, unsafe_allow_html=True)
         
         if st.button("Cadastrar", use_container_width=True, type="primary"):
             numero = f"DSC-{int(datetime.now().timestamp() * 1000)}"
@@ -1081,6 +1281,126 @@ def admin_login_screen():
             st.session_state.screen = 'home'
             st.rerun()
 
+# Fragmento: cada ✅/❌ reexecuta só a moderação, que busca só os primeiros
+# pendentes; o resto da tela (trimestre, ranking, export) não recarrega.
+# Os contadores dos cards vêm das listas da carga completa e são ajustados
+# a cada ação (sem count() no servidor a cada clique)
+
+def _contagens_admin(descartes, resgates):
+    return {
+        'descartes': len(descartes),
+        'aprovados': sum(1 for d in descartes if d['status'] == 'Aprovado'),
+        'descartes_pendentes': sum(1 for d in descartes if d['status'] == 'Pendente'),
+        'cupons_pendentes': sum(1 for r in resgates if r['status'] == 'Pendente')
+    }
+
+def _ajustar_contagem(campo, delta):
+    contagens = st.session_state.admin_contagens
+    contagens[campo] = max(contagens[campo] + delta, 0)
+
+@st.fragment
+def _admin_moderacao(usuarios_por_id):
+    contagens = st.session_state.admin_contagens
+    descartes_pend = load_pendentes('descartes')
+    cupons_pend = load_pendentes('resgates')
+    
+    # Lista menor que o limite = são todos os pendentes (corrige a contagem)
+    if len(descartes_pend) < LIMITE_PENDENTES_ADMIN:
+        contagens['descartes_pendentes'] = len(descartes_pend)
+    if len(cupons_pend) < LIMITE_PENDENTES_ADMIN:
+        contagens['cupons_pendentes'] = len(cupons_pend)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.markdown(f"<div class='stat-card'><p>Usuários</p><h1>{len(usuarios_por_id)}</h1></div>", unsafe_allow_html=True)
+    with col2:
+        st.markdown(f"<div class='stat-card'><p>Descartes</p><h1>{contagens['descartes']}</h1></div>", unsafe_allow_html=True)
+    with col3:
+        st.markdown(f"<div class='stat-card'><p>Aprovados</p><h1>{contagens['aprovados']}</h1></div>", unsafe_allow_html=True)
+    with col4:
+        st.markdown(f"<div class='stat-card'><p>Cupons Pend</p><h1>{contagens['cupons_pendentes']}</h1></div>", unsafe_allow_html=True)
+    
+    if db:
+        impacto = impacto_da_escola(db)
+        st.info(f"🌍 Escola: {impacto['quantidade']} aparelhos | ☠️ {impacto['chumbo']:.2f} kg de chumbo | 🌱 {impacto['co2_evitado_kg']:.0f} kg de CO₂ | 💧 {impacto['agua_economizada_litros']:.0f} L de água")
+    
+    st.markdown("---")
+    st.markdown(f"### ⏳ Descartes Pendentes ({contagens['descartes_pendentes']})")
+    
+    if descartes_pend:
+        for d in descartes_pend:
+            user = usuarios_por_id.get(d['usuarioId'])
+            col1, col2, col3 = st.columns([4, 1, 1])
+            correcao = None
+            with col1:
+                st.markdown(f"""<div class='card-wait'>
+                    <b>{d['numero']}</b> | {user['nome'] if user else 'N/A'} ({user['turma'] if user else 'N/A'})<br>
+                    {d['material']} ({d['quantidade']} un) = {d['pontos']} pts
+                </div>""", unsafe_allow_html=True)
+                if d.get('customizado'):
+                    # Pré-seleciona a sugestão do modelo; a escolha do admin vira rótulo
+                    opcoes = ['—'] + sorted(PALAVRAS_CHAVE_MATERIAIS)
+                    sugerido = sugerir_material(d['material'])['material']
+                    correcao = st.selectbox("🤖 Material correto", opcoes,
+                                            index=opcoes.index(sugerido) if sugerido in opcoes else 0,
+                                            key=f"m{d['id']}")
+            with col2:
+                if st.button("✅", key=f"a{d['id']}", use_container_width=True):
+                    aprovado, _ = aprovar_descarte(d['id'], correcao if correcao != '—' else None)
+                    
+                    if aprovado:
+                        _ajustar_contagem('aprovados', 1)
+                        _ajustar_contagem('descartes_pendentes', -1)
+                        if EXPORT_DISPONIVEL:
+                            registrar_evento(db, 'descarte_aprovado', d['usuarioId'], {
+                                'descarte_id': d['id'],
+                                'material': d['material'],
+                                'pontos_adicionados': d['pontos']
+                            })
+                    
+                    st.rerun(scope='fragment')
+            with col3:
+                if st.button("❌", key=f"r{d['id']}", use_container_width=True):
+                    atualizar_status_descarte(d['id'], 'Recusado')
+                    _ajustar_contagem('descartes_pendentes', -1)
+                    st.rerun(scope='fragment')
+    else:
+        st.info("Nenhum pendente")
+    
+    st.markdown("---")
+    st.markdown(f"### 🎫 Cupons Pendentes ({contagens['cupons_pendentes']})")
+    
+    if cupons_pend:
+        for r in cupons_pend:
+            user = usuarios_por_id.get(r['usuarioId'])
+            col1, col2, col3 = st.columns([3, 1, 1])
+            with col1:
+                st.markdown(f"""<div class='card-wait'>
+                    <b>{r['codigo']}</b> | {user['nome'] if user else 'N/A'}<br>
+                    {r['categoria']} - {r['cupom']}
+                </div>""", unsafe_allow_html=True)
+            with col2:
+                if st.button("✅", key=f"ac{r['id']}", use_container_width=True):
+                    atualizar_status_resgate(r['id'], 'Aprovado')
+                    _ajustar_contagem('cupons_pendentes', -1)
+                    
+                    if EXPORT_DISPONIVEL:
+                        registrar_evento(db, 'cupom_aprovado', r['usuarioId'], {
+                            'cupom_codigo': r['codigo'],
+                            'categoria': r['categoria'],
+                            'pontos': r['pontos']
+                        })
+                    
+                    st.rerun(scope='fragment')
+            with col3:
+                if st.button("❌", key=f"rc{r['id']}", use_container_width=True):
+                    atualizar_status_resgate(r['id'], 'Recusado')
+                    atualizar_pontos(r['usuarioId'], r['pontos'])
+                    _ajustar_contagem('cupons_pendentes', -1)
+                    st.rerun(scope='fragment')
+    else:
+        st.info("Nenhum pendente")
+
 def admin_screen():
     st.markdown("<h1 style='color: #22c55e;'>⚙️ Admin</h1>", unsafe_allow_html=True)
     
@@ -1088,10 +1408,7 @@ def admin_screen():
         st.session_state.screen = 'home'
         st.rerun()
     
-    usuarios = load_usuarios()
-    descartes = load_descartes()
-    resgates = load_resgates()
-    trimestre_atual = get_trimestre_atual()
+    usuarios, descartes, resgates, trimestre_atual = carregar_dados_admin()
     
     st.markdown("### 📅 Controle de Trimestre")
     
@@ -1123,20 +1440,13 @@ def admin_screen():
                 st.success("✅ 3º ativado!")
                 st.rerun()
     
+    usuarios_por_id = {u['id']: u for u in usuarios}
+    # Carga completa (não roda nos reruns do fragmento): contagens atualizadas
+    st.session_state.admin_contagens = _contagens_admin(descartes, resgates)
+    
     st.markdown("---")
     st.markdown(f"### 📊 Trimestre {trimestre_atual}")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.markdown(f"<div class='stat-card'><p>Usuários</p><h1>{len(usuarios)}</h1></div>", unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"<div class='stat-card'><p>Descartes</p><h1>{len(descartes)}</h1></div>", unsafe_allow_html=True)
-    with col3:
-        aprovados = len([d for d in descartes if d['status'] == 'Aprovado'])
-        st.markdown(f"<div class='stat-card'><p>Aprovados</p><h1>{aprovados}</h1></div>", unsafe_allow_html=True)
-    with col4:
-        pend = len([r for r in resgates if r['status'] == 'Pendente'])
-        st.markdown(f"<div class='stat-card'><p>Cupons Pend</p><h1>{pend}</h1></div>", unsafe_allow_html=True)
+    _admin_moderacao(usuarios_por_id)
     
     st.markdown("---")
     st.markdown(f"### 🏆 Ranking Top 20")
@@ -1160,70 +1470,11 @@ def admin_screen():
         </div>""", unsafe_allow_html=True)
     
     st.markdown("---")
-    st.markdown("### ⏳ Descartes Pendentes")
-    descartes_pend = [d for d in descartes if d['status'] == 'Pendente']
-    
-    if descartes_pend:
-        for d in descartes_pend[:10]:
-            user = next((u for u in usuarios if u['id'] == d['usuarioId']), None)
-            col1, col2, col3 = st.columns([4, 1, 1])
-            with col1:
-                st.markdown(f"""<div class='card-wait'>
-                    <b>{d['numero']}</b> | {user['nome'] if user else 'N/A'} ({user['turma'] if user else 'N/A'})<br>
-                    {d['material']} ({d['quantidade']} un) = {d['pontos']} pts
-                </div>""", unsafe_allow_html=True)
-            with col2:
-                if st.button("✅", key=f"a{d['id']}", use_container_width=True):
-                    atualizar_status_descarte(d['id'], 'Aprovado')
-                    atualizar_pontos(d['usuarioId'], d['pontos'])
-                    
-                    if EXPORT_DISPONIVEL:
-                        registrar_evento(db, 'descarte_aprovado', d['usuarioId'], {
-                            'descarte_id': d['id'],
-                            'material': d['material'],
-                            'pontos_adicionados': d['pontos']
-                        })
-                    
-                    st.rerun()
-            with col3:
-                if st.button("❌", key=f"r{d['id']}", use_container_width=True):
-                    atualizar_status_descarte(d['id'], 'Recusado')
-                    st.rerun()
-    else:
-        st.info("Nenhum pendente")
-    
-    st.markdown("---")
-    st.markdown("### 🎫 Cupons Pendentes")
-    cupons_pend = [r for r in resgates if r['status'] == 'Pendente']
-    
-    if cupons_pend:
-        for r in cupons_pend[:10]:
-            user = next((u for u in usuarios if u['id'] == r['usuarioId']), None)
-            col1, col2, col3 = st.columns([3, 1, 1])
-            with col1:
-                st.markdown(f"""<div class='card-wait'>
-                    <b>{r['codigo']}</b> | {user['nome'] if user else 'N/A'}<br>
-                    {r['categoria']} - {r['cupom']}
-                </div>""", unsafe_allow_html=True)
-            with col2:
-                if st.button("✅", key=f"ac{r['id']}", use_container_width=True):
-                    atualizar_status_resgate(r['id'], 'Aprovado')
-                    
-                    if EXPORT_DISPONIVEL:
-                        registrar_evento(db, 'cupom_aprovado', r['usuarioId'], {
-                            'cupom_codigo': r['codigo'],
-                            'categoria': r['categoria'],
-                            'pontos': r['pontos']
-                        })
-                    
-                    st.rerun()
-            with col3:
-                if st.button("❌", key=f"rc{r['id']}", use_container_width=True):
-                    atualizar_status_resgate(r['id'], 'Recusado')
-                    atualizar_pontos(r['usuarioId'], r['pontos'])
-                    st.rerun()
-    else:
-        st.info("Nenhum pendente")
+    st.markdown("### 🤖 Identificador de Materiais")
+    if st.button("Retreinar com descartes aprovados"):
+        modelo = retreinar_identificador()
+        if modelo:
+            st.success(f"✅ Modelo treinado com {modelo['exemplos']} exemplos")
     
     if EXPORT_DISPONIVEL:
         mostrar_painel_export(db, usuarios, descartes, resgates)
@@ -1270,6 +1521,12 @@ def main():
         cupons_screen()
     elif screen == 'resgates':
         resgates_screen()
+    elif screen == 'historico':
+        if st.session_state.user:
+            historico_screen()
+        else:
+            st.session_state.screen = 'home'
+            st.rerun()
     elif screen == 'admin_login':
         admin_login_screen()
     elif screen == 'admin':
@@ -0,0 +1,301 @@
+# modelo_identificador.py - Pesos Aprendidos para o Identificador de Materiais
+
+"""
+Treina pesos por palavra a partir das decisões dos moderadores
+- Rótulos: descartes aprovados (material do catálogo, ou a correção do
+  admin - materialCorrigido - nos customizados) + as palavras-chave de
+  PALAVRAS_CHAVE_MATERIAIS como exemplos-semente
+- Modelo: Naive Bayes multinomial sobre tokens normalizados
+- Serializado em um JSON compacto no documento config/modelo_identificador:
+  o ServicoConfig já mantém a coleção config em memória com um listener,
+  então um retreino aparece em todos os processos sem reiniciar
+- Avaliação offline de precisão/recall contra a heurística atual
+"""
+
+from datetime import datetime
+import json
+import math
+import threading
+import time
+
+from config_servico import obter_servico_config
+from normalizacao_texto import normalizar_texto
+from identificador_materiais import PALAVRAS_CHAVE_MATERIAIS, identificar_material
+
+# Documento da coleção config com o modelo serializado (campo 'json')
+DOC_MODELO = 'modelo_identificador'
+
+# Probabilidade mínima (posterior) para considerar o material identificado
+THRESHOLD_MODELO = 0.6
+
+# Suavização de Laplace (baixa: cada material tem poucas palavras-chave,
+# com 0.5 as probabilidades ficam achatadas e quase nada passa do threshold)
+ALFA = 0.01
+
+# ========================================
+# COLETA DE EXEMPLOS (RÓTULOS)
+# ========================================
+
+def exemplos_semente():
+    """Cada palavra-chave da base vira um exemplo (texto, material)"""
+    return [
+        (keyword, material)
+        for material, data in PALAVRAS_CHAVE_MATERIAIS.items()
+        for keyword in data['keywords']
+    ]
+
+def coletar_exemplos(db):
+    """
+    Exemplos rotulados pelos moderadores: descartes aprovados
+    - customizado com materialCorrigido: (texto digitado, correção)
+    - do catálogo: (nome do material, material)
+    Customizados aprovados sem correção não têm rótulo e ficam de fora
+    
+    Returns:
+        list de (texto, material)
+    """
+    exemplos = []
+    query = (db.collection('descartes')
+             .where('status', '==', 'Aprovado')
+             .select(['material', 'materialCorrigido', 'customizado']))
+    for doc in query.stream():
+        data = doc.to_dict()
+        texto = data.get('material')
+        if data.get('customizado'):
+            material = data.get('materialCorrigido')
+        else:
+            material = data.get('materialCorrigido') or texto
+        if texto and material in PALAVRAS_CHAVE_MATERIAIS:
+            exemplos.append((str(texto), material))
+    return exemplos
+
+# ========================================
+# TREINO E SERIALIZAÇÃO
+# ========================================
+
+def _tokens(texto):
+    return normalizar_texto(texto).split()
+
+def treinar_modelo(exemplos, alfa=ALFA):
+    """
+    Naive Bayes multinomial
+    
+    Returns:
+        dict serializável com classes, log-priors e log-probabilidades
+        por token (uma lista com um valor por classe)
+    """
+    classes = list(PALAVRAS_CHAVE_MATERIAIS.keys())
+    indice = {c: i for i, c in enumerate(classes)}
+    
+    docs_por_classe = [0] * len(classes)
+    contagens = {}
+    total_tokens = [0] * len(classes)
+    
+    for texto, material in exemplos:
+        c = indice[material]
+        docs_por_classe[c] += 1
+        for token in _tokens(texto):
+            contagens.setdefault(token, [0] * len(classes))[c] += 1
+            total_tokens[c] += 1
+    
+    total_docs = sum(docs_por_classe)
+    vocabulario = len(contagens)
+    
+    log_prior = [
+        math.log((docs_por_classe[c] + 1) / (total_docs + len(classes)))
+        for c in range(len(classes))
+    ]
+    tokens = {
+        token: [
+            round(math.log((contagem[c] + alfa) / (total_tokens[c] + alfa * vocabulario)), 4)
+            for c in range(len(classes))
+        ]
+        for token, contagem in contagens.items()
+    }
+    
+    return {
+        'versao': 1,
+        'treinadoEm': datetime.now().strftime('%d/%m/%Y %H:%M'),
+        'exemplos': total_docs,
+        'classes': classes,
+        'categorias': [PALAVRAS_CHAVE_MATERIAIS[c]['categoria'] for c in classes],
+        'log_prior': [round(p, 4) for p in log_prior],
+        'tokens': tokens
+    }
+
+# Último JSON decodificado: só decodifica de novo quando o documento muda
+_MODELO_DECODIFICADO = {'json': None, 'modelo': None}
+_MODELO_LOCK = threading.Lock()
+
+def salvar_modelo(db, modelo):
+    obter_servico_config(db).definir(DOC_MODELO, {
+        'json': json.dumps(modelo, ensure_ascii=False, separators=(',', ':')),
+        'exemplos': modelo['exemplos'],
+        'treinadoEm': modelo['treinadoEm']
+    })
+
+def carregar_modelo(db):
+    """
+    Modelo salvo em config/modelo_identificador (None se nunca foi treinado)
+    
+    Lido da cópia em memória do ServicoConfig (sem ir ao Firestore); o
+    JSON é decodificado uma vez por versão do documento
+    """
+    if not db:
+        return None
+    texto = obter_servico_config(db).valor(DOC_MODELO, 'json')
+    if texto is None:
+        return None
+    
+    with _MODELO_LOCK:
+        if texto != _MODELO_DECODIFICADO['json']:
+            _MODELO_DECODIFICADO['modelo'] = json.loads(texto)
+            _MODELO_DECODIFICADO['json'] = texto
+        return _MODELO_DECODIFICADO['modelo']
+
+def treinar_e_salvar(db):
+    """Pipeline completo: coleta rótulos, treina e salva (todos os processos passam a usar)"""
+    exemplos = exemplos_semente() + coletar_exemplos(db)
+    modelo = treinar_modelo(exemplos)
+    salvar_modelo(db, modelo)
+    return modelo
+
+# ========================================
+# CLASSIFICAÇÃO
+# ========================================
+
+def classificar(descricao, modelo):
+    """
+    Returns:
+        list de (material, probabilidade, categoria), ordenada;
+        vazia se nenhuma palavra da descrição é conhecida
+    """
+    linhas = [modelo['tokens'][t] for t in _tokens(descricao) if t in modelo['tokens']]
+    if not linhas:
+        return []
+    
+    log_probs = list(modelo['log_prior'])
+    for linha in linhas:
+        for c, valor in enumerate(linha):
+            log_probs[c] += valor
+    
+    maximo = max(log_probs)
+    exps = [math.exp(v - maximo) for v in log_probs]
+    total = sum(exps)
+    
+    resultado = [
+        (modelo['classes'][c], exps[c] / total, modelo['categorias'][c])
+        for c in range(len(exps))
+    ]
+    resultado.sort(key=lambda x: x[1], reverse=True)
+    return resultado
+
+def identificar_material_aprendido(descricao_usuario, modelo=None):
+    """
+    Mesmo formato de identificar_material(), usando o modelo treinado
+    (carregar_modelo(db)); sem modelo, cai na heurística de palavras-chave
+    """
+    if modelo is None:
+        return identificar_material(descricao_usuario)
+    
+    probabilidades = classificar(descricao_usuario or '', modelo)
+    if not probabilidades:
+        return {
+            'identificado': False,
+            'material': None,
+            'confianca': 0.0,
+            'categoria': None,
+            'sugestoes': []
+        }
+    
+    material, prob, categoria = probabilidades[0]
+    if prob >= THRESHOLD_MODELO:
+        return {
+            'identificado': True,
+            'material': material,
+            'confianca': prob,
+            'categoria': categoria,
+            'sugestoes': []
+        }
+    
+    return {
+        'identificado': False,
+        'material': None,
+        'confianca': prob,
+        'categoria': None,
+        'sugestoes': [
+            {'material': m, 'score': p, 'categoria': c}
+            for m, p, c in probabilidades[:5] if p > 0.1
+        ]
+    }
+
+# ========================================
+# AVALIAÇÃO OFFLINE
+# ========================================
+
+def _metricas(previsoes, exemplos):
+    feitas = [(p, esperado) for p, (_, esperado) in zip(previsoes, exemplos) if p]
+    acertos = sum(1 for p, esperado in feitas if p == esperado)
+    return {
+        'precisao': acertos / len(feitas) if feitas else 0.0,
+        'recall': acertos / len(exemplos) if exemplos else 0.0,
+        'cobertura': len(feitas) / len(exemplos) if exemplos else 0.0
+    }
+
+def avaliar(modelo, exemplos_teste):
+    """
+    Precisão (acertos / identificados) e recall (acertos / total)
+    do modelo e da heurística atual no mesmo conjunto de teste
+    """
+    previsoes_modelo = [identificar_material_aprendido(t, modelo)['material'] for t, _ in exemplos_teste]
+    previsoes_heuristica = [identificar_material(t)['material'] for t, _ in exemplos_teste]
+    
+    inicio = time.perf_counter()
+    for texto, _ in exemplos_teste:
+        classificar(texto, modelo)
+    micros = (time.perf_counter() - inicio) / max(len(exemplos_teste), 1) * 1_000_000
+    
+    return {
+        'modelo': _metricas(previsoes_modelo, exemplos_teste),
+        'heuristica': _metricas(previsoes_heuristica, exemplos_teste),
+        'microssegundos_por_descricao': micros
+    }
+
+# Descrições reais (digitadas por alunos) com o material correto
+EXEMPLOS_AVALIACAO = [
+    ("um celular velho", 'Celular'),
+    ("televisão quebrada", 'Televisor'),
+    ("notebook dell", 'Notebook'),
+    ("carregador de telefone", 'Carregador'),
+    ("negocio de passar roupa", 'Ferro de Passar'),
+    ("caixa de som bluetooth", 'Caixa de Som'),
+    ("pilhas usadas do controle", 'Bateria'),
+    ("smartphone samsung com tela trincada", 'Celular'),
+    ("mouse sem fio", 'Mouse'),
+    ("teclado do computador", 'Teclado'),
+    ("impressora multifuncional hp", 'Impressora'),
+    ("modem da internet", 'Roteador'),
+    ("fone de ouvido com fio", 'Fone de Ouvido'),
+    ("ventilador de mesa", 'Ventilador'),
+    ("liquidificador antigo", 'Liquidificador'),
+    ("controle remoto da tv", 'Controle Remoto'),
+    ("pendrive 8gb", 'HD Externo'),
+    ("video game playstation 2", 'Video Game'),
+    ("micro ondas enferrujado", 'Micro-ondas'),
+    ("monitor de pc", 'Monitor')
+]
+
+def testar_modelo():
+    """Treina só com as sementes e compara com a heurística"""
+    modelo = treinar_modelo(exemplos_semente())
+    resultado = avaliar(modelo, EXEMPLOS_AVALIACAO)
+    
+    print("🧪 AVALIAÇÃO DO MODELO APRENDIDO\n")
+    print(f"Tamanho do modelo: {len(json.dumps(modelo, separators=(',', ':'))) / 1024:.1f} KB")
+    for nome in ('heuristica', 'modelo'):
+        m = resultado[nome]
+        print(f"{nome:11} precisão {m['precisao']:.0%} | recall {m['recall']:.0%} | cobertura {m['cobertura']:.0%}")
+    print(f"Classificação: {resultado['microssegundos_por_descricao']:.1f} µs por descrição")
+
+if __name__ == "__main__":
+    testar_modelo()
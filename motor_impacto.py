@@ -0,0 +1,227 @@
+# motor_impacto.py - Impacto Ambiental Agregado (Vetorizado)
+
+"""
+Soma o impacto ambiental de muitos descartes de uma vez
+- Cada material é uma linha da matriz de fatores (CAMPOS_IMPACTO)
+- Quantidades por (grupo, material) somadas com np.bincount
+- Totais de todos os grupos = um único produto de matrizes
+- Grupos: escola inteira, aluno, turma ou trimestre
+- Sem NumPy, usa o mesmo cálculo em Python puro
+"""
+
+import random
+import time
+
+from registro_materiais import carregar_registro, CAMPOS_IMPACTO
+
+try:
+    import numpy as np
+    NUMPY_DISPONIVEL = True
+except ImportError:
+    np = None
+    NUMPY_DISPONIVEL = False
+
+# Nome de cada coluna do resultado (mesma ordem de CAMPOS_IMPACTO)
+CAMPOS_TOTAL = tuple('peso_total_kg' if campo == 'peso_medio_kg' else campo for campo in CAMPOS_IMPACTO)
+
+class MatrizImpacto:
+    """
+    Fatores de impacto por unidade, uma linha por material com dados
+    
+    Descartes de materiais sem fatores (customizados não reconhecidos,
+    materiais sem impacto cadastrado) são ignorados na soma
+    """
+    
+    def __init__(self, registro=None):
+        registro = registro or carregar_registro()
+        self._registro = registro
+        self.materiais = [
+            nome for nome, material in registro.materiais.items()
+            if material['vetor_impacto'] is not None
+        ]
+        self.indice = {nome: i for i, nome in enumerate(self.materiais)}
+        self.fatores = [registro.materiais[nome]['vetor_impacto'] for nome in self.materiais]
+        self.matriz = np.asarray(self.fatores, dtype=np.float64) if NUMPY_DISPONIVEL else None
+        self._codigos = {}
+    
+    def codigo(self, material):
+        """Linha do material na matriz (nome ou apelido), -1 se não houver"""
+        codigo = self._codigos.get(material)
+        if codigo is None:
+            encontrado = self._registro.buscar(str(material or ''))
+            codigo = self.indice.get(encontrado['nome'], -1) if encontrado else -1
+            self._codigos[material] = codigo
+        return codigo
+
+_MATRIZ = None
+
+def obter_matriz():
+    global _MATRIZ
+    if _MATRIZ is None:
+        _MATRIZ = MatrizImpacto()
+    return _MATRIZ
+
+def _chave_grupo(chave):
+    if chave is None:
+        return lambda d: 'escola'
+    if callable(chave):
+        return chave
+    return lambda d: d.get(chave)
+
+def _como_dict(valores, quantidade):
+    resultado = {campo: float(v) for campo, v in zip(CAMPOS_TOTAL, valores)}
+    resultado['quantidade'] = int(quantidade)
+    return resultado
+
+def agregar_impacto(descartes, chave=None, somente_aprovados=True, matriz=None, vetorizado=True):
+    """
+    Impacto total por grupo
+    
+    Args:
+        descartes: iterável de dicts (material, materialCorrigido,
+            quantidade, status, ...)
+        chave: None (escola inteira), nome de campo ('usuarioId',
+            'trimestre', ...) ou função descarte -> grupo
+        somente_aprovados: Ignora descartes que não estão 'Aprovado'
+        vetorizado: Usa NumPy quando disponível
+    
+    Returns:
+        dict grupo -> {peso_total_kg, chumbo, ..., quantidade}
+    """
+    matriz = matriz or obter_matriz()
+    grupo_de = _chave_grupo(chave)
+    
+    grupos = {}
+    cod_grupo = []
+    cod_material = []
+    quantidades = []
+    
+    for d in descartes:
+        if somente_aprovados and d.get('status') != 'Aprovado':
+            continue
+        # Mesmo material que contadores_impacto: a correção do admin vale mais
+        m = matriz.codigo(d.get('materialCorrigido') or d.get('material'))
+        if m < 0:
+            continue
+        g = grupos.setdefault(grupo_de(d), len(grupos))
+        cod_grupo.append(g)
+        cod_material.append(m)
+        quantidades.append(d.get('quantidade', 0) or 0)
+    
+    if not grupos:
+        return {}
+    
+    if vetorizado and NUMPY_DISPONIVEL:
+        totais, contagens = _agregar_numpy(matriz, len(grupos), cod_grupo, cod_material, quantidades)
+    else:
+        totais, contagens = _agregar_python(matriz, len(grupos), cod_grupo, cod_material, quantidades)
+    
+    return {
+        grupo: _como_dict(totais[g], contagens[g])
+        for grupo, g in grupos.items()
+    }
+
+def _agregar_numpy(matriz, n_grupos, cod_grupo, cod_material, quantidades):
+    """Q[grupo, material] = soma das quantidades; totais = Q @ fatores"""
+    n_materiais = len(matriz.materiais)
+    celulas = np.asarray(cod_grupo, dtype=np.int64) * n_materiais + np.asarray(cod_material, dtype=np.int64)
+    q = np.asarray(quantidades, dtype=np.float64)
+    
+    Q = np.bincount(celulas, weights=q, minlength=n_grupos * n_materiais).reshape(n_grupos, n_materiais)
+    return Q @ matriz.matriz, Q.sum(axis=1)
+
+def _agregar_python(matriz, n_grupos, cod_grupo, cod_material, quantidades):
+    campos = len(CAMPOS_IMPACTO)
+    totais = [[0.0] * campos for _ in range(n_grupos)]
+    contagens = [0] * n_grupos
+    
+    for g, m, q in zip(cod_grupo, cod_material, quantidades):
+        linha = totais[g]
+        for i, fator in enumerate(matriz.fatores[m]):
+            linha[i] += fator * q
+        contagens[g] += q
+    
+    return totais, contagens
+
+# ========================================
+# ATALHOS
+# ========================================
+
+def impacto_escola(descartes):
+    return agregar_impacto(descartes).get('escola', _como_dict([0.0] * len(CAMPOS_TOTAL), 0))
+
+def impacto_por_aluno(descartes):
+    return agregar_impacto(descartes, 'usuarioId')
+
+def impacto_por_trimestre(descartes):
+    """Descartes antigos (sem campo trimestre) ficam no grupo None"""
+    return agregar_impacto(descartes, 'trimestre')
+
+def impacto_por_turma(descartes, usuarios):
+    turma_do_usuario = {u['id']: u.get('turma') for u in usuarios}
+    return agregar_impacto(descartes, lambda d: turma_do_usuario.get(d.get('usuarioId')))
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def gerar_descartes_sinteticos(quantidade, alunos=800, seed=42):
+    """Descartes falsos (90% aprovados) para testes"""
+    rng = random.Random(seed)
+    materiais = list(carregar_registro().pontos_por_categoria().values())
+    nomes = [nome for grupo in materiais for nome in grupo]
+    
+    return [
+        {
+            'id': i,
+            'usuarioId': rng.randrange(alunos),
+            'material': rng.choice(nomes),
+            'quantidade': rng.randint(1, 5),
+            'status': 'Aprovado' if rng.random() < 0.9 else 'Pendente',
+            'trimestre': rng.randint(1, 3)
+        }
+        for i in range(quantidade)
+    ]
+
+def benchmark_impacto(quantidade=1_000_000):
+    """Compara calcular_impacto_total por descarte com o motor vetorizado"""
+    from database_impacto import calcular_impacto_total
+    
+    print(f"🧪 BENCHMARK IMPACTO AGREGADO ({quantidade:,} descartes)\n")
+    descartes = gerar_descartes_sinteticos(quantidade)
+    
+    inicio = time.perf_counter()
+    por_aluno_antigo = {}
+    for d in descartes:
+        if d['status'] != 'Aprovado':
+            continue
+        impacto = calcular_impacto_total(d['material'], d['quantidade'])
+        total = por_aluno_antigo.setdefault(d['usuarioId'], {'chumbo': 0.0, 'co2_evitado_kg': 0.0})
+        total['chumbo'] += impacto['metais_pesados_total']['chumbo']
+        total['co2_evitado_kg'] += impacto['co2_evitado_kg']
+    tempo_antigo = time.perf_counter() - inicio
+    
+    tempos = {}
+    for nome, vetorizado in (('Python', False), ('NumPy', True)):
+        if vetorizado and not NUMPY_DISPONIVEL:
+            continue
+        inicio = time.perf_counter()
+        por_aluno = agregar_impacto(descartes, 'usuarioId', vetorizado=vetorizado)
+        tempos[nome] = time.perf_counter() - inicio
+    
+    iguais = all(
+        abs(por_aluno[aluno]['chumbo'] - total['chumbo']) < 1e-6
+        and abs(por_aluno[aluno]['co2_evitado_kg'] - total['co2_evitado_kg']) < 1e-6
+        for aluno, total in por_aluno_antigo.items()
+    )
+    
+    print(f"{'calcular_impacto_total por descarte':36} {tempo_antigo:.2f}s")
+    for nome, tempo in tempos.items():
+        print(f"{'Motor (' + nome + ')':36} {tempo:.2f}s")
+    print(f"Totais idênticos: {iguais}")
+    
+    escola = impacto_escola(descartes)
+    print(f"\nEscola: {escola['quantidade']:,} aparelhos | {escola['chumbo']:,.1f} kg de chumbo | {escola['co2_evitado_kg']:,.0f} kg de CO₂")
+
+if __name__ == "__main__":
+    benchmark_impacto()
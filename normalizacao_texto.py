@@ -0,0 +1,124 @@
+# normalizacao_texto.py - Normalização Rápida de Texto
+
+"""
+Normalização de texto para identificação e buscas
+- Minúsculas, sem acentos, só letras/números/espaços
+- Cobre todos os diacríticos latinos (não só os do português)
+- Tabela str.maketrans pré-calculada na importação (uma passada por texto)
+- Cache LRU para descrições repetidas
+"""
+
+from functools import lru_cache
+import time
+import unicodedata
+
+# Letras latinas que não se decompõem em NFKD
+_ESPECIAIS = {
+    'ß': 'ss', 'æ': 'ae', 'œ': 'oe', 'ø': 'o', 'đ': 'd', 'ð': 'd',
+    'ł': 'l', 'þ': 'th', 'ħ': 'h', 'ı': 'i', 'ŀ': 'l', 'ŧ': 't'
+}
+
+# Blocos latinos: Latin-1, Extended-A/B e Latin Extended Additional
+_FAIXAS_LATINAS = [(0x00C0, 0x024F), (0x1E00, 0x1EFF)]
+
+def _base_ascii(char):
+    """Letra/número ASCII equivalente a um caractere latino ('' se não houver)"""
+    minuscula = char.lower()
+    if minuscula in _ESPECIAIS:
+        return _ESPECIAIS[minuscula]
+    
+    decomposto = unicodedata.normalize('NFKD', minuscula)
+    base = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    if base.isascii() and base.isalnum():
+        return base
+    return ''
+
+def _montar_tabela():
+    tabela = {}
+    
+    for codigo in range(128):
+        char = chr(codigo)
+        tabela[codigo] = char.lower() if char.isalnum() else ' '
+    
+    for inicio, fim in _FAIXAS_LATINAS:
+        for codigo in range(inicio, fim + 1):
+            base = _base_ascii(chr(codigo))
+            tabela[codigo] = base if base else ' '
+    
+    return str.maketrans(tabela)
+
+_TABELA = _montar_tabela()
+
+def _normalizar_resto(texto):
+    """Caminho lento para caracteres fora da tabela (grego, emojis, etc)"""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    sem_marcas = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    sem_marcas = sem_marcas.translate(_TABELA)
+    return ''.join(c if c.isascii() else ' ' for c in sem_marcas)
+
+@lru_cache(maxsize=4096)
+def normalizar_texto(texto):
+    """
+    Normaliza texto para comparação
+    Remove acentos, converte para minúsculas, remove caracteres especiais
+    """
+    if not texto:
+        return ""
+    
+    texto = texto.translate(_TABELA)
+    
+    if not texto.isascii():
+        texto = _normalizar_resto(texto)
+    
+    # Remover espaços múltiplos
+    return ' '.join(texto.split())
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def benchmark_normalizacao(repeticoes=20000):
+    """Compara a vazão da versão antiga, da tabela sem cache e com cache"""
+    import re
+    
+    def normalizar_texto_regex(texto):
+        """normalizar_texto anterior (replace + duas regex)"""
+        if not texto:
+            return ""
+        texto = texto.lower().strip()
+        for antigo, novo in {'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a', 'é': 'e', 'ê': 'e', 'í': 'i',
+                             'ó': 'o', 'ô': 'o', 'õ': 'o', 'ú': 'u', 'ü': 'u', 'ç': 'c'}.items():
+            texto = texto.replace(antigo, novo)
+        texto = re.sub(r'[^a-z0-9\s]', ' ', texto)
+        return re.sub(r'\s+', ' ', texto).strip()
+    
+    textos = [
+        "Televisão de Plasma QUEBRADA!!",
+        "carregador de celular (original)",
+        "Micro-ondas Electrolux 20L",
+        "Aparelho de ar-condicionado Split",
+        "Ventilador de teto - 3 pás",
+        "Crème brûlée über Ñandú",
+        "fone de ouvido 🎧 bluetooth"
+    ]
+    
+    print("🧪 BENCHMARK DA NORMALIZAÇÃO\n")
+    
+    for texto in textos:
+        print(f"'{texto}' -> '{normalizar_texto(texto)}'")
+    print()
+    
+    sem_cache = normalizar_texto.__wrapped__
+    
+    for nome, funcao in [('Regex (anterior)', normalizar_texto_regex),
+                         ('Tabela', sem_cache),
+                         ('Tabela + LRU', normalizar_texto)]:
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            for texto in textos:
+                funcao(texto)
+        vazao = repeticoes * len(textos) / (time.perf_counter() - inicio)
+        print(f"{nome:18} {vazao:,.0f} textos/s")
+
+if __name__ == "__main__":
+    benchmark_normalizacao()
@@ -0,0 +1,89 @@
+# projecoes.py - Campos Lidos por Tela (Projeções do Firestore)
+
+"""
+Conjuntos de campos que cada tela realmente usa
+- Consultas com select([...]) / get(field_paths=...) trazem só esses campos
+- Hash da senha (senha) e código de recuperação nunca saem do servidor
+  fora do login / recuperação de senha
+- Benchmark de bytes e tempo por tela, projeção vs documento inteiro
+"""
+
+import json
+import random
+import time
+from datetime import datetime
+
+# Campos sensíveis: só login e recuperação de senha leem
+CAMPOS_SENSIVEIS = ('senha', 'codigoRecuperacao', 'codigoExpiracao')
+
+CAMPOS_USUARIO = {
+    # Usuário logado (dashboard, cupons, configurações)
+    'sessao': ('id', 'nome', 'turma', 'email', 'pontos', 'categoriasCompradas',
+               'dataCadastro', 'ativo', 'impacto'),
+    # Painel admin: ranking, pendentes, snapshot do trimestre e export CSV
+    'admin': ('id', 'nome', 'turma', 'email', 'pontos', 'dataCadastro', 'ativo')
+}
+
+def projetar(query, tela):
+    """query.select() com os campos de usuário da tela"""
+    return query.select(list(CAMPOS_USUARIO[tela]))
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def _tamanho_bytes(dados):
+    """Tamanho aproximado do documento no fio (JSON UTF-8)"""
+    return len(json.dumps(dados, default=str, ensure_ascii=False).encode('utf-8'))
+
+def gerar_usuarios_sinteticos(quantidade, seed=42):
+    """Usuários falsos com hash bcrypt, histórico de categorias e impacto"""
+    rng = random.Random(seed)
+    usuarios = []
+    for i in range(quantidade):
+        usuarios.append({
+            'id': i,
+            'nome': f'Aluno {i} da Silva',
+            'turma': rng.choice(['601', '702', '803', '904']),
+            'email': f'aluno{i}@escola.edu.br',
+            'senha': '$2b$12$' + ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789./') for _ in range(53)),
+            'pontos': round(rng.uniform(0, 200), 1),
+            'categoriasCompradas': {'1': ['Artes', 'Inglês'], '2': ['Matemática'], '3': []},
+            'dataCadastro': datetime.now(),
+            'ativo': True,
+            'consentimento_lgpd': {'aceito': True, 'data': datetime.now(), 'versao': '1.0'},
+            'impacto': {'chumbo': 1.6, 'mercurio': 0.004, 'cadmio': 0.1, 'niquel': 0.3,
+                        'co2_evitado_kg': 160.0, 'quantidade': 6}
+        })
+    return usuarios
+
+def benchmark_projecao(db, usuarios=5000, popular=True):
+    """
+    Bytes e tempo para carregar 'usuarios' inteiros vs cada projeção
+    
+    Rodar contra um banco local (emulador): com popular=True grava
+    usuários sintéticos na coleção 'usuarios_benchmark'
+    """
+    colecao = db.collection('usuarios_benchmark')
+    
+    if popular:
+        dados = gerar_usuarios_sinteticos(usuarios)
+        for i in range(0, len(dados), 500):
+            batch = db.batch()
+            for usuario in dados[i:i + 500]:
+                batch.set(colecao.document(str(usuario['id'])), usuario)
+            batch.commit()
+    
+    print(f"🧪 BENCHMARK PROJEÇÕES ({usuarios:,} usuários)\n")
+    
+    consultas = [('documento inteiro', colecao)]
+    consultas += [(f"tela '{tela}'", projetar(colecao, tela)) for tela in CAMPOS_USUARIO]
+    
+    base = None
+    for nome, query in consultas:
+        inicio = time.perf_counter()
+        docs = [doc.to_dict() for doc in query.stream()]
+        tempo = time.perf_counter() - inicio
+        total = sum(_tamanho_bytes(d) for d in docs)
+        base = base or total
+        print(f"{nome:20} {total / 1024:9,.0f} KB ({total / base:4.0%}) | {tempo * 1000:7.1f} ms")
@@ -0,0 +1,160 @@
+# reclassificacao_descartes.py - Reclassificação em Lote de Descartes Customizados
+
+"""
+Classifica em lote os descartes de "Outro Material" (customizado: True)
+- Lê todos os descartes customizados do Firestore
+- Roda o identificador (tolerante a erros) em processos paralelos
+- Cada texto distinto é classificado uma única vez
+- Grava materialSugerido / categoriaSugerida em WriteBatches
+- Modo dry-run: só gera o relatório, sem gravar nada
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import os
+
+from identificador_materiais import identificar_material_fuzzy
+
+# Limite de operações por WriteBatch do Firestore
+LIMITE_BATCH = 500
+
+# Abaixo disso não compensa abrir processos
+MINIMO_PARALELO = 1000
+
+def classificar_textos(textos):
+    """
+    Classifica uma lista de descrições (roda dentro dos processos)
+    
+    Returns:
+        list de (texto, material, categoria, confianca); material None
+        quando não identificado
+    """
+    resultados = []
+    for texto in textos:
+        resultado = identificar_material_fuzzy(texto)
+        resultados.append((
+            texto,
+            resultado['material'],
+            resultado['categoria'],
+            resultado['confianca']
+        ))
+    return resultados
+
+def _em_blocos(itens, tamanho):
+    for i in range(0, len(itens), tamanho):
+        yield itens[i:i + tamanho]
+
+def classificar_em_paralelo(textos, processos=None, tamanho_bloco=200):
+    """
+    Classifica textos distintos, em paralelo quando a lista é grande
+    
+    Returns:
+        dict texto -> (material, categoria, confianca)
+    """
+    textos = sorted(set(textos))
+    
+    if len(textos) < MINIMO_PARALELO or processos == 1:
+        resultados = classificar_textos(textos)
+    else:
+        processos = processos or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = [
+                r
+                for bloco in executor.map(classificar_textos, _em_blocos(textos, tamanho_bloco))
+                for r in bloco
+            ]
+    
+    return {texto: (material, categoria, confianca) for texto, material, categoria, confianca in resultados}
+
+def reclassificar_descartes_customizados(db, dry_run=True, refazer=False, processos=None):
+    """
+    Sugere material/categoria para os descartes customizados
+    
+    Args:
+        db: Firestore client
+        dry_run: Se True, só retorna o relatório (não grava)
+        refazer: Se True, reclassifica também os que já têm sugestão
+        processos: Nº de processos (padrão: nº de CPUs)
+    
+    Returns:
+        dict com o relatório (totais, contagem por material, não identificados)
+    """
+    descartes = []
+    for doc in db.collection('descartes').where('customizado', '==', True).stream():
+        data = doc.to_dict()
+        if not refazer and data.get('materialSugerido'):
+            continue
+        descartes.append((doc.reference, str(data.get('material', '') or '')))
+    
+    sugestoes = classificar_em_paralelo([texto for _, texto in descartes], processos)
+    
+    relatorio = {
+        'dry_run': dry_run,
+        'total': len(descartes),
+        'textos_distintos': len(sugestoes),
+        'identificados': 0,
+        'nao_identificados': 0,
+        'por_material': {},
+        'textos_nao_identificados': {},
+        'gravados': 0
+    }
+    
+    batch = db.batch()
+    pendentes = 0
+    agora = datetime.now()
+    
+    for ref, texto in descartes:
+        material, categoria, confianca = sugestoes[texto]
+        
+        if not material:
+            relatorio['nao_identificados'] += 1
+            relatorio['textos_nao_identificados'][texto] = relatorio['textos_nao_identificados'].get(texto, 0) + 1
+            continue
+        
+        relatorio['identificados'] += 1
+        relatorio['por_material'][material] = relatorio['por_material'].get(material, 0) + 1
+        
+        if dry_run:
+            continue
+        
+        batch.update(ref, {
+            'materialSugerido': material,
+            'categoriaSugerida': categoria,
+            'confiancaSugestao': confianca,
+            'dataReclassificacao': agora
+        })
+        pendentes += 1
+        relatorio['gravados'] += 1
+        
+        if pendentes == LIMITE_BATCH:
+            batch.commit()
+            batch = db.batch()
+            pendentes = 0
+    
+    if pendentes:
+        batch.commit()
+    
+    relatorio['por_material'] = sorted(relatorio['por_material'].items(), key=lambda x: x[1], reverse=True)
+    relatorio['textos_nao_identificados'] = sorted(
+        relatorio['textos_nao_identificados'].items(), key=lambda x: x[1], reverse=True
+    )
+    
+    return relatorio
+
+def formatar_relatorio_reclassificacao(relatorio):
+    """Texto simples do relatório (para terminal ou st.text)"""
+    linhas = [
+        f"{'🧪 DRY-RUN' if relatorio['dry_run'] else '✅ GRAVADO'} - Reclassificação de descartes customizados",
+        f"Descartes analisados: {relatorio['total']} ({relatorio['textos_distintos']} textos distintos)",
+        f"Identificados: {relatorio['identificados']} | Não identificados: {relatorio['nao_identificados']}",
+        f"Sugestões gravadas: {relatorio['gravados']}",
+        "",
+        "Por material:"
+    ]
+    linhas += [f"  {material}: {n}" for material, n in relatorio['por_material']]
+    
+    if relatorio['textos_nao_identificados']:
+        linhas += ["", "Textos não identificados (top 20):"]
+        linhas += [f"  '{texto}': {n}" for texto, n in relatorio['textos_nao_identificados'][:20]]
+    
+    return '\n'.join(linhas)
@@ -0,0 +1,181 @@
+# registro_materiais.py - Registro Único de Materiais
+
+"""
+Fonte única dos dados de cada material eletrônico
+- Lido uma vez de materiais.json (arquivo versionado)
+- Pontos (main.MATERIAIS), palavras-chave (identificador) e impacto
+  ambiental (database_impacto) são visões da mesma estrutura
+- Busca O(1) por nome ou apelido normalizado
+- Índice por categoria e vetor de impacto por unidade pré-calculado
+- Material novo = nova entrada no JSON, sem mexer no código
+"""
+
+from functools import lru_cache
+import copy
+import json
+import os
+import warnings
+
+from normalizacao_texto import normalizar_texto
+
+CAMINHO_REGISTRO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'materiais.json')
+
+# Ordem das posições do vetor de impacto por unidade
+CAMPOS_IMPACTO = (
+    'peso_medio_kg',
+    'chumbo',
+    'mercurio',
+    'cadmio',
+    'niquel',
+    'co2_evitado_kg',
+    'energia_economizada_kwh',
+    'agua_economizada_litros'
+)
+
+METAIS_PESADOS = ('chumbo', 'mercurio', 'cadmio', 'niquel')
+
+def _vetor_impacto(impacto):
+    """Valores por unidade na ordem de CAMPOS_IMPACTO (None sem dados)"""
+    if not impacto:
+        return None
+    
+    metais = impacto['metais_pesados']
+    return tuple(
+        float(metais.get(campo, 0.0)) if campo in METAIS_PESADOS else float(impacto[campo])
+        for campo in CAMPOS_IMPACTO
+    )
+
+class RegistroMateriais:
+    """
+    Materiais carregados do arquivo de dados
+    
+    Cada material é um dict com nome, categoria, pontos (None se não
+    pode ser escolhido na tela de descarte), keywords, impacto e
+    vetor_impacto
+    """
+    
+    def __init__(self, dados):
+        self.versao = dados.get('versao', 1)
+        self.materiais = {}
+        self.por_categoria = {categoria: [] for categoria in dados.get('categorias', [])}
+        self._apelidos = {}
+        
+        for item in dados['materiais']:
+            material = dict(item)
+            material['vetor_impacto'] = _vetor_impacto(material.get('impacto'))
+            nome = material['nome']
+            chave = normalizar_texto(nome)
+            
+            if nome in self.materiais or chave in self._apelidos:
+                raise ValueError(f"Material duplicado no registro: {nome}")
+            
+            self.materiais[nome] = material
+            self.por_categoria.setdefault(material['categoria'], []).append(nome)
+            self._apelidos[chave] = nome
+        
+        # Keywords podem se repetir entre materiais (o identificador pontua
+        # as duas); só viram apelido de busca quando apontam para um único
+        # material e não coincidem com o nome de outro
+        donos = {}
+        for nome, material in self.materiais.items():
+            for keyword in material['keywords']:
+                donos.setdefault(normalizar_texto(keyword), set()).add(nome)
+        
+        # {keyword normalizada: materiais} das que ficaram sem busca direta
+        self.keywords_ambiguas = {}
+        for chave, nomes in donos.items():
+            if chave in self._apelidos:
+                continue
+            if len(nomes) == 1:
+                self._apelidos[chave] = next(iter(nomes))
+            else:
+                self.keywords_ambiguas[chave] = sorted(nomes)
+        
+        if self.keywords_ambiguas:
+            warnings.warn(
+                "Keywords em mais de um material (sem busca direta): "
+                + '; '.join(f"'{chave}' ({', '.join(nomes)})" for chave, nomes in self.keywords_ambiguas.items()),
+                stacklevel=2
+            )
+    
+    def buscar(self, nome):
+        """Material pelo nome ou apelido (qualquer acentuação/caixa), ou None"""
+        if nome in self.materiais:
+            return self.materiais[nome]
+        
+        nome_oficial = self._apelidos.get(normalizar_texto(nome or ''))
+        return self.materiais[nome_oficial] if nome_oficial else None
+    
+    def materiais_da_categoria(self, categoria):
+        return [self.materiais[nome] for nome in self.por_categoria.get(categoria, [])]
+    
+    # ========================================
+    # VISÕES NOS FORMATOS ANTIGOS
+    # ========================================
+    
+    def pontos_por_categoria(self):
+        """{categoria: {material: pontos}} - formato de main.MATERIAIS"""
+        visao = {}
+        for categoria, nomes in self.por_categoria.items():
+            pontos = {
+                nome: self.materiais[nome]['pontos']
+                for nome in nomes
+                if self.materiais[nome]['pontos'] is not None
+            }
+            if pontos:
+                visao[categoria] = pontos
+        return visao
+    
+    def palavras_chave(self):
+        """{material: {keywords, categoria, confianca}} - formato do identificador"""
+        return {
+            nome: {
+                'keywords': material['keywords'],
+                'categoria': material['categoria'],
+                'confianca': 0
+            }
+            for nome, material in self.materiais.items()
+        }
+    
+    def impacto_ambiental(self):
+        """{material: impacto} - formato de database_impacto.IMPACTO_AMBIENTAL"""
+        return {
+            nome: material['impacto']
+            for nome, material in self.materiais.items()
+            if material.get('impacto')
+        }
+
+@lru_cache(maxsize=None)
+def carregar_registro(caminho=CAMINHO_REGISTRO):
+    """Lê e indexa o arquivo de materiais uma única vez por processo"""
+    with open(caminho, encoding='utf-8') as arquivo:
+        return RegistroMateriais(json.load(arquivo))
+
+def obter_material(nome):
+    """
+    Atalho: material pelo nome ou apelido no registro padrão
+    
+    Devolve uma cópia: o registro é compartilhado pelo processo inteiro
+    (MATERIAIS, IMPACTO_AMBIENTAL, vetores de impacto)
+    """
+    material = carregar_registro().buscar(nome)
+    return copy.deepcopy(material) if material is not None else None
+
+def testar_registro(caminho=CAMINHO_REGISTRO):
+    """Confere materiais.json: carrega sem erro e sem keywords ambíguas"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        with open(caminho, encoding='utf-8') as arquivo:
+            registro = RegistroMateriais(json.load(arquivo))
+    
+    print("🧪 REGISTRO DE MATERIAIS\n")
+    print(f"Materiais: {len(registro.materiais)} | Categorias: {len(registro.por_categoria)}")
+    if registro.keywords_ambiguas:
+        for chave, nomes in registro.keywords_ambiguas.items():
+            print(f"⚠️ '{chave}' em {', '.join(nomes)}")
+    else:
+        print("✅ Nenhuma keyword em mais de um material")
+    return not registro.keywords_ambiguas
+
+if __name__ == "__main__":
+    testar_registro()
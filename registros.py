@@ -0,0 +1,162 @@
+# registros.py - Registros Compactos (Descartes, Resgates, Usuários)
+
+"""
+Objetos leves para as listas carregadas do Firestore
+- __slots__ no lugar de um dict por documento (bem menos memória)
+- Datas ficam como datetime; o texto dd/mm/aaaa HH:MM só é gerado
+  quando o campo é lido (a maioria dos registros nunca é exibida)
+- Acesso igual ao de dict (r['status'], r.get('email', 'N/A'), 'x' in r),
+  então telas e exports não mudam
+"""
+
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+FORMATO_DATA = '%d/%m/%Y %H:%M'
+
+class Registro:
+    """
+    Base: um slot por campo conhecido, campos desconhecidos em _extras
+    
+    Campo ausente no documento = slot não atribuído (KeyError / get padrão),
+    igual ao dict que existia antes
+    """
+    
+    __slots__ = ()
+    CAMPOS = ()
+    CAMPOS_DATA = ()
+    
+    def __init__(self, dados):
+        self._extras = None
+        for campo, valor in dados.items():
+            self[campo] = valor
+    
+    @classmethod
+    def do_documento(cls, doc):
+        return cls(doc.to_dict())
+    
+    def bruto(self, campo, padrao=None):
+        """Valor original (datetime nas datas)"""
+        if campo in self.CAMPOS:
+            return getattr(self, campo, padrao)
+        return self._extras.get(campo, padrao) if self._extras else padrao
+    
+    def __getitem__(self, campo):
+        if campo in self.CAMPOS:
+            try:
+                valor = getattr(self, campo)
+            except AttributeError:
+                raise KeyError(campo) from None
+            if campo in self.CAMPOS_DATA and hasattr(valor, 'strftime'):
+                return valor.strftime(FORMATO_DATA)
+            return valor
+        if self._extras and campo in self._extras:
+            return self._extras[campo]
+        raise KeyError(campo)
+    
+    def __setitem__(self, campo, valor):
+        if campo in self.CAMPOS:
+            setattr(self, campo, valor)
+        else:
+            if self._extras is None:
+                self._extras = {}
+            self._extras[campo] = valor
+    
+    def get(self, campo, padrao=None):
+        try:
+            return self[campo]
+        except KeyError:
+            return padrao
+    
+    def __contains__(self, campo):
+        if campo in self.CAMPOS:
+            return hasattr(self, campo)
+        return bool(self._extras) and campo in self._extras
+    
+    def keys(self):
+        campos = [campo for campo in self.CAMPOS if hasattr(self, campo)]
+        return campos + list(self._extras or ())
+    
+    def items(self):
+        return [(campo, self[campo]) for campo in self.keys()]
+    
+    def to_dict(self):
+        """dict com as datas já formatadas (mesmo formato dos load_* antigos)"""
+        return dict(self.items())
+    
+    def __eq__(self, outro):
+        if isinstance(outro, Registro):
+            return self.to_dict() == outro.to_dict()
+        if isinstance(outro, dict):
+            return self.to_dict() == outro
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Descarte(Registro):
+    CAMPOS = ('id', 'usuarioId', 'numero', 'linha', 'material', 'quantidade', 'pontos',
+              'status', 'customizado', 'trimestre', 'data', 'dataAprovacao', 'materialCorrigido')
+    CAMPOS_DATA = ('data',)
+    __slots__ = CAMPOS + ('_extras',)
+
+class Resgate(Registro):
+    CAMPOS = ('id', 'usuarioId', 'categoria', 'cupom', 'codigo', 'pontos', 'status', 'data')
+    CAMPOS_DATA = ('data',)
+    __slots__ = CAMPOS + ('_extras',)
+
+class Usuario(Registro):
+    # Campos de projecoes.CAMPOS_USUARIO['sessao'] (senha nunca vem nas listas)
+    CAMPOS = ('id', 'nome', 'turma', 'email', 'pontos', 'categoriasCompradas',
+              'dataCadastro', 'ativo', 'impacto')
+    CAMPOS_DATA = ('dataCadastro',)
+    __slots__ = CAMPOS + ('_extras',)
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def benchmark_registros(quantidade=100_000):
+    """Memória e tempo de carga de 'quantidade' descartes: dict vs Descarte"""
+    from motor_impacto import gerar_descartes_sinteticos
+    
+    def formatar_como_antes(dados):
+        """Carga antiga dos load_*: strftime em todo documento e um dict por registro"""
+        if 'data' in dados and hasattr(dados['data'], 'strftime'):
+            dados['data'] = dados['data'].strftime(FORMATO_DATA)
+        return dados
+    
+    agora = datetime.now()
+    documentos = gerar_descartes_sinteticos(quantidade)
+    for i, d in enumerate(documentos):
+        d.update({'numero': f'#{i:06d}', 'linha': 'Linha Verde', 'pontos': 10.0,
+                  'customizado': False, 'data': agora})
+    
+    print(f"🧪 BENCHMARK REGISTROS ({quantidade:,} descartes)\n")
+    
+    resultados = {}
+    for nome, carregar in (('dict + strftime', formatar_como_antes), ('Descarte (slots)', Descarte)):
+        # dict(d) = o que doc.to_dict() entrega para cada documento
+        inicio = time.perf_counter()
+        registros = [carregar(dict(d)) for d in documentos]
+        tempo = time.perf_counter() - inicio
+        del registros
+        
+        # Memória que fica retida depois da carga
+        tracemalloc.start()
+        registros = [carregar(dict(d)) for d in documentos]
+        memoria, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        resultados[nome] = registros
+        print(f"{nome:18} {memoria / 1024 / 1024:7.1f} MB | {tempo * 1000:7.1f} ms "
+              f"| {sys.getsizeof(registros[0]):4d} bytes/objeto")
+    
+    antigos, novos = resultados.values()
+    print(f"\nMesmo conteúdo: {all(a == n for a, n in zip(antigos, novos))}")
+
+if __name__ == "__main__":
+    benchmark_registros()